@@ -37,7 +37,7 @@ def run_agent1(hr_data_path="hr_mock_data.json"):
         """
 
     # LLM call
-    response = ask_hf_model(prompt)
+    response = ask_hf_model(prompt, task="hr_analysis")
 
     # FIX: Same cleaning as Agent 2
     response_clean = (
@@ -1,16 +1,19 @@
+import hashlib
 import json
-import os
 from Model import ask_hf_model
+from hr_dataset import load_values
+from output_store import get_store
+
+STATE_KEY = "Agent2"
 
-def run_agent2():
-    hr_data_path = os.path.join(os.path.dirname(__file__), "hr_mock_data.json")
 
-    with open(hr_data_path, "r") as f:
-        hr_data = json.load(f)
+def news_hash(item) -> str:
+    text = item if isinstance(item, str) else json.dumps(item, sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
-    company_news = hr_data.get("company_news", [])
 
-    prompt = f"""
+def _full_prompt(company_news) -> str:
+    return f"""
         You are an AI assistant specializing in HR-related company news summarization.
         Given the following company news updates, do the following:
         1. Summarize the key company developments.
@@ -42,8 +45,68 @@ def run_agent2():
         }}
             """
 
+
+def _delta_prompt(previous, new_items) -> str:
+    return f"""
+        You are an AI assistant specializing in HR-related company news summarization.
+        You already produced the analysis below. New company news has arrived since then.
+        1. Update the analysis so it also covers the new developments and their impact on
+           HR, hiring, employee engagement, or staffing strategy. Keep what is still relevant.
+        2. Return the full updated task list: keep previous tasks that still apply and add
+           tasks for the new news. Keep Agent ID as 2 in all tasks.
+
+        Previous Analysis:
+        {previous.get("Analysis", "")}
+
+        Previous tasks:
+        {json.dumps(previous.get("tasks", []), indent=2)}
+
+        New Company News:
+        {json.dumps(new_items, indent=2)}
+
+        Respond **strictly** in this JSON format:
+        {{
+        "Analysis": "Updated summary and HR implications...",
+        "Company_news": [...new items only...],
+        "tasks": [
+            {{
+            "Agent_ID": 2,
+            "task_description": "..."
+            }}
+        ]
+        }}
+            """
+
+
+def run_agent2():
+    """
+    Summarize company news incrementally: only items not seen in an earlier run
+    are sent to the LLM, together with the previous result. State (seen item
+    hashes + last result) is kept in the shared store so it survives restarts.
+    """
+    company_news = load_values("company_news")
+    hashes = [news_hash(item) for item in company_news]
+
+    store = get_store()
+    state = store.load_state(STATE_KEY) or {}
+    previous = state.get("result")
+    seen = set(state.get("seen", []))
+
+    new_items = [item for item, h in zip(company_news, hashes) if h not in seen]
+    removed = bool(seen - set(hashes))
+
+    if previous and not new_items and not removed:
+        print("[INFO] Agent2: no new company news; reusing previous analysis.")
+        return previous
+
+    if previous and not removed:
+        prompt = _delta_prompt(previous, new_items)
+    else:
+        # first run, or items were withdrawn → summarize everything again
+        prompt = _full_prompt(company_news)
+
     # Call the LLM through Model.py
-    response = ask_hf_model(prompt).strip("`").strip()
+    response = ask_hf_model(prompt, task="hr_analysis").strip("`").strip()
 
     if response.startswith("json"):
         response = response.replace("json", "", 1).strip()
@@ -52,7 +115,11 @@ def run_agent2():
         result = json.loads(response)
     except json.JSONDecodeError:
         print("⚠️ Model returned invalid JSON. Returning raw text.\n")
-        result = {"Analysis": response, "tasks": []}
+        # don't advance the state → these items are retried next cycle
+        return {"Analysis": response, "tasks": []}
 
-    return result
+    if previous and not removed:
+        result["Company_news"] = list(previous.get("Company_news", [])) + list(result.get("Company_news", new_items))
 
+    store.save_state(STATE_KEY, {"seen": hashes, "result": result})
+    return result
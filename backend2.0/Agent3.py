@@ -1,23 +1,134 @@
 import json
-import os
 from Model import ask_hf_model
+from hr_dataset import load_columns, load_values
+from search_index import tokenize
+
+# ---------- Local routing rules ----------
+# intent → trigger words, owning department, and the task it turns into
+INTENT_RULES = {
+    "hiring": {
+        "keywords": ["hire", "hiring", "recruit", "recruitment", "intern", "interns", "openings", "vacancy", "vacancies", "headcount"],
+        "owner": "HR",
+        "action": "Open requisitions and run recruitment",
+    },
+    "survey": {
+        "keywords": ["survey", "surveys", "satisfaction", "engagement", "poll", "pulse"],
+        "owner": "HR",
+        "action": "Design, run and analyse the survey",
+    },
+    "report": {
+        "keywords": ["report", "reports", "reporting", "summary", "review"],
+        "owner": "HR",
+        "action": "Prepare and submit the requested report",
+    },
+    "onboarding": {
+        "keywords": ["onboarding", "induction", "orientation"],
+        "owner": "HR",
+        "action": "Update the onboarding process",
+    },
+    "policy": {
+        "keywords": ["policy", "policies", "guidelines", "handbook", "hybrid", "remote"],
+        "owner": "HR",
+        "action": "Review and update the policy",
+    },
+    "training": {
+        "keywords": ["training", "workshop", "upskill", "upskilling", "certification"],
+        "owner": "HR",
+        "action": "Plan and schedule the training",
+    },
+    "payroll": {
+        "keywords": ["payroll", "salary", "salaries", "bonus", "compensation", "appraisal"],
+        "owner": "HR",
+        "action": "Process the compensation change",
+    },
+}
+
+# extra words that point at a department besides its own name
+DEPARTMENT_ALIASES = {
+    "Engineering": ["engineering", "engineers", "developers", "ai", "ml", "data", "analytics", "tech"],
+    "Sales": ["sales", "customers", "clients", "revenue"],
+    "HR": ["hr", "people"],
+}
+
+
+def build_routing_index(departments):
+    """Inverted index: token → [("intent", name) | ("department", name)]."""
+    index = {}
+    for intent, rule in INTENT_RULES.items():
+        for word in rule["keywords"]:
+            index.setdefault(word, []).append(("intent", intent))
+    for dept in departments:
+        for word in set(tokenize(dept)) | set(DEPARTMENT_ALIASES.get(dept, [])):
+            index.setdefault(word, []).append(("department", dept))
+    return index
+
+
+def route_notification(text, index, departments):
+    """
+    Classify one notification locally.
+    Returns (intent, target departments), or None when no single intent wins.
+    """
+    intent_hits, dept_hits = {}, []
+    for token in tokenize(text):
+        for kind, name in index.get(token, []):
+            if kind == "intent":
+                intent_hits[name] = intent_hits.get(name, 0) + 1
+            elif name not in dept_hits:
+                dept_hits.append(name)
+
+    if not intent_hits:
+        return None
+    ranked = sorted(intent_hits.values(), reverse=True)
+    if len(ranked) > 1 and ranked[0] == ranked[1]:
+        return None   # e.g. "policy" vs "survey" equally likely → let the LLM decide
+
+    intent = max(intent_hits, key=intent_hits.get)
+    owner = INTENT_RULES[intent]["owner"]
+    targets = [owner] if owner in departments else []
+    targets += [d for d in dept_hits if d not in targets]
+    return (intent, targets) if targets else None
+
 
 def run_agent3():
-    hr_data_path = os.path.join(os.path.dirname(__file__), "hr_mock_data.json")
+    # only the two columns this agent reads (see hr_dataset.py)
+    notifications = load_values("notifications")
+    department_col = load_columns("employees", ["department"]).get("department", [])
+    departments = sorted(set(department_col))
+
+    index = build_routing_index(departments)
 
-    with open(hr_data_path, "r") as f:
-        hr_data = json.load(f)
+    routed, tasks, unmatched = [], [], []
+    for text in notifications:
+        match = route_notification(text, index, departments)
+        if match is None:
+            unmatched.append(text)
+            continue
 
-    notifications = hr_data.get("notifications", [])
-    departments = list({emp["department"] for emp in hr_data.get("employees", [])})
+        intent, targets = match
+        owner, others = targets[0], targets[1:]
+        detail = INTENT_RULES[intent]["action"]
+        if others:
+            detail += f" (for {', '.join(others)})"
+        tasks.append({"Agent_ID": 3, "task_description": f"Department: {owner} → {detail}: {text}"})
+        routed.append({"notification": text, "intent": intent, "departments": targets, "routed_by": "rules"})
 
+    intents = sorted({r["intent"] for r in routed})
+    analysis = (
+        f"{len(routed)} of {len(notifications)} notifications routed by rules"
+        + (f" (intents: {', '.join(intents)})." if intents else ".")
+    )
+
+    if not unmatched:
+        return {"Analysis": analysis, "Notifications": notifications, "Routing": routed, "tasks": tasks}
+
+    # ---------- LLM fallback: one batched call for the ambiguous remainder ----------
     prompt = f"""
         You are an intelligent HR Task Distributor.
         You will read management notifications and convert them into clear HR task assignments.
 
         ### Inputs:
         Notifications:
-        {json.dumps(notifications, indent=2)}
+        {json.dumps(unmatched, indent=2)}
 
         Departments available:
         {departments}
@@ -43,7 +154,7 @@ def run_agent3():
             """
 
     # Call the LLM (using Model.py’s unified HF client)
-    response = ask_hf_model(prompt).strip("`").strip()
+    response = ask_hf_model(prompt, task="notification_routing").strip("`").strip()
 
     if response.startswith("json"):
         response = response.replace("json", "", 1).strip()
@@ -54,5 +165,13 @@ def run_agent3():
         print("⚠️ Model returned invalid JSON. Returning raw text.\n")
         result = {"Analysis": response, "tasks": []}
 
-    return result
-
+    llm_routing = [
+        {"notification": text, "routed_by": "llm"} for text in unmatched
+    ]
+    return {
+        "Analysis": f"{analysis} {result.get('Analysis', '')}".strip(),
+        # the dashboard renders Notifications as plain strings; routing details go under Routing
+        "Notifications": notifications,
+        "Routing": routed + llm_routing,
+        "tasks": tasks + list(result.get("tasks", [])),
+    }
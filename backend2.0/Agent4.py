@@ -1,11 +1,12 @@
 import json
 import os
+from typing import Any
 from Model import ask_hf_model
 
-def generate_assessment(job_description: str, applicant_cv: str) -> str:
+def generate_assessment(job_description: str, applicant_cv: str) -> dict:
     """
     Generates a 20-question technical/aptitude test based on the job description and applicant's CV.
-    Output: JSON string containing structured questions.
+    Output: dict containing structured questions.
     """
     prompt = f"""
         You are an AI Recruitment Test Generator.
@@ -38,7 +39,7 @@ def generate_assessment(job_description: str, applicant_cv: str) -> str:
         }}
         """
 
-    response = ask_hf_model(prompt).strip("`").strip()
+    response = ask_hf_model(prompt, task="assessment_generation").strip("`").strip()
     if response.startswith("json"):
         response = response.replace("json", "", 1).strip()
 
@@ -48,18 +49,23 @@ def generate_assessment(job_description: str, applicant_cv: str) -> str:
     except json.JSONDecodeError:
         questions_json = {"error": "Failed to parse JSON", "raw_output": response}
 
-    return json.dumps(questions_json, indent=2)
+    return questions_json
 
 
-def evaluate_responses(questions_with_answers: str, user_responses: str) -> str:
+def evaluate_responses(questions_with_answers: Any, user_responses: Any) -> dict:
     """
     Evaluates applicant's responses to the generated test and gives a score out of 10.
     Input:
-        - questions_with_answers: JSON string from generate_assessment (including correct answers)
-        - user_responses: JSON or text list of user's answers
+        - questions_with_answers: output of generate_assessment (including correct answers)
+        - user_responses: list of user's answers (or plain text)
     Output:
-        - JSON string with total_score and feedback
+        - dict with score and feedback
     """
+    # the prompt needs text; compact JSON keeps it short
+    if not isinstance(questions_with_answers, str):
+        questions_with_answers = json.dumps(questions_with_answers, separators=(",", ":"), ensure_ascii=False)
+    if not isinstance(user_responses, str):
+        user_responses = json.dumps(user_responses, separators=(",", ":"), ensure_ascii=False)
 
     prompt = f"""
         You are an AI HR Evaluation Assistant.
@@ -82,7 +88,7 @@ def evaluate_responses(questions_with_answers: str, user_responses: str) -> str:
         }}
         """
 
-    response = ask_hf_model(prompt).strip("`").strip()
+    response = ask_hf_model(prompt, task="assessment_evaluation").strip("`").strip()
     if response.startswith("json"):
         response = response.replace("json", "", 1).strip()
 
@@ -91,4 +97,4 @@ def evaluate_responses(questions_with_answers: str, user_responses: str) -> str:
     except json.JSONDecodeError:
         result_json = {"error": "Failed to parse JSON", "raw_output": response}
 
-    return json.dumps(result_json, indent=2)
+    return result_json
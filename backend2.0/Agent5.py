@@ -1,6 +1,7 @@
 import json
 import os
 from Model import ask_hf_model
+from hr_dataset import is_ingested, load_records
 
 def run_agent5(payroll_data_path: str = "hr_mock_data.json"):
     """
@@ -11,11 +12,16 @@ def run_agent5(payroll_data_path: str = "hr_mock_data.json"):
 
     # ---------- Load payroll-related data ----------
     abs_path = os.path.join(os.path.dirname(__file__), payroll_data_path)
-    with open(abs_path, "r") as f:
-        hr_data = json.load(f)
+    if is_ingested(abs_path):
+        # export the columns were built from → read just these two sections
+        employees = load_records("employees")
+        performance = load_records("performance_reports")
+    else:
+        with open(abs_path, "r") as f:
+            hr_data = json.load(f)
 
-    employees = hr_data.get("employees", [])
-    performance = hr_data.get("performance_reports", {})
+        employees = hr_data.get("employees", [])
+        performance = hr_data.get("performance_reports", {})
 
     # ---------- Prompt for the LLM ----------
     prompt = f"""
@@ -61,7 +67,7 @@ Performance Reports:
     """
 
     # ---------- Call model ----------
-    response = ask_hf_model(prompt).strip("`").strip()
+    response = ask_hf_model(prompt, task="hr_analysis").strip("`").strip()
     if response.startswith("json"):
         response = response.replace("json", "", 1).strip()
 
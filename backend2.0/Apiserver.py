@@ -1,44 +1,102 @@
-from fastapi import FastAPI, HTTPException, Request, UploadFile, File, Form
-from fastapi.responses import JSONResponse
-from multiprocessing import Process, Manager, freeze_support
+from fastapi import FastAPI, HTTPException, Request, UploadFile, File, Form, Header, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from multiprocessing import Process, freeze_support
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from Orchestration import run_all_agents_forever, AGENTS
-from chatbot import ask_gemini 
+from output_store import get_store
+from task_queue import get_queue
+from task_worker import start_workers
+from github_store import fetch_job_description, FILE_PATH, CHAIN_FILE_PATH
+from leader_election import lease_status
+from chatbot import ask_hr_assistant
+from request_timing import TimingMiddleware, span
+from admission import AdmissionMiddleware
+import admission
+from profiler import ProfileMiddleware
+import profiler
 from dotenv import load_dotenv
 from pydantic import BaseModel
+import mongodb
+import Model
+import llm_gateway
+import github_store
 from mongodb import (
     create_application,
     get_applications_by_job_id,
     get_application_by_id,
-    save_assessment_for_application,
     # ⬇️ you will add this in mongodb.py
     update_application_status,  
+    search_applications,
+    get_prescreen_candidates,
+    get_resume_texts,
+    get_cached_resume_texts,
+    resume_hash,
+    create_applications_bulk,
+    save_prescreen_scores,
+    update_application_statuses,
+    get_application_stats,
+    get_funnel_metrics,
+    iter_applications_for_export,
+    EXPORT_FIELDS,
 )
 
 
-from extracttext import extract_text
+from extracttext import extract_text, extract_text_from_bytes
 from Agent4 import generate_assessment, evaluate_responses
+from merkle import MerkleAccumulator, hash_obj
 
 import uvicorn
 import os
-import requests
 import json
-import base64
+import hashlib
 import tempfile
+import threading
+import csv
+import io
+import mimetypes
+import orjson
+import re
+import time
+import zipfile
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 
 # ✅ Load environment variables from .env
 load_dotenv()
 
-GITHUB_REPO = os.getenv("GITHUB_REPO")
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-FILE_PATH = os.getenv("FILE_PATH")
-
+# Bulk import (/applications/bulk)
+BULK_IMPORT_WORKERS = int(os.getenv("BULK_IMPORT_WORKERS", os.cpu_count() or 2))
+BULK_IMPORT_BATCH_SIZE = 200
+BULK_IMPORT_MAX_FILE_BYTES = 20 * 1024 * 1024
+BULK_STATUS_MAX_ITEMS = 1000
+SUPPORTED_RESUME_EXTS = {".pdf", ".docx", ".txt"}
+
+# Export streaming (/applications/{job_id}/export)
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+EXPORT_CHUNK_BYTES = 64 * 1024
+# cells starting with these are run as formulas by Excel / Sheets
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+# orjson for every response; large payloads return ORJSONResponse directly,
+# which also skips FastAPI's jsonable_encoder pass over plain dicts/lists
 app = FastAPI(
     title="Agent Output API",
     version="1.1",
-    description="Serves live agent outputs."
+    description="Serves live agent outputs.",
+    default_response_class=ORJSONResponse,
 )
 
+# Concurrency / task-backlog limits and per-client quotas for LLM-backed routes (see admission.py)
+app.add_middleware(AdmissionMiddleware)
+
+# Server-Timing header + slow-request log (see request_timing.py)
+app.add_middleware(TimingMiddleware)
+
+# Opt-in per-request sampling profiler; not installed at all without PROFILE_TOKEN (see profiler.py)
+if profiler.PROFILE_TOKEN:
+    app.add_middleware(ProfileMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -47,7 +105,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-agent_outputs = None
+# Cached Merkle tree over chain.json blocks (leaf = hash(block), same as merkle.js)
+chain_tree = MerkleAccumulator()
+chain_tree_lock = threading.Lock()
+
+
+def sync_chain_tree(chain: list) -> MerkleAccumulator:
+    """
+    Bring chain_tree up to date with the given list of blocks.
+    The chain is append-only, so normally only the new blocks are hashed.
+    If history was rewritten (shorter chain / different tail) we rebuild once.
+    """
+    global chain_tree
+    with chain_tree_lock:
+        known = len(chain_tree)
+
+        if known > len(chain) or (known and chain_tree.leaf(known - 1) != hash_obj(chain[known - 1])):
+            chain_tree = MerkleAccumulator(hash_obj(block) for block in chain)
+        elif len(chain) > known:
+            chain_tree.extend(hash_obj(block) for block in chain[known:])
+
+        return chain_tree
 
 
 @app.get("/")
@@ -56,39 +134,169 @@ def root():
         "message": "Agent Output API is live 🚀",
         "docs": "/docs",
         "endpoints": [
+            "/healthz",
+            "/readyz",
             "/outputs",
             "/outputs/{agent_name}",
+            "/outputs/{agent_name}/history",
+            "/orchestrator/status",
+            "/github/stats",
+            "/admission/stats",
+            "/profile/agents/next-cycle",
+            "/analytics/funnel",
             "/run_once",
             "/addjob",
             "/getjobs",
             "/chain",  
+            "/chain/proof/{block_no}",
             "/updatejob/{job_id}",
             "/deletejob/{job_id}",
             "/applications",
+            "/applications/bulk",
+            "/applications/search",
             "/applications/{job_id}",
+            "/applications/{job_id}/ranked",
+            "/applications/{job_id}/stats",
+            "/applications/{job_id}/export",
+            "/applications/status",
             "/applications/{application_id}/assessment/start",   # ✅ NEW
             "/applications/{application_id}/assessment/submit",  # ✅ NEW
+            "/tasks/{task_id}",
             "/agent/assessment/generate",
             "/agent/assessment/evaluate",
         ],
     }
 
 
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up and serving. Touches no dependencies."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz():
+    """
+    Readiness: check each dependency (initializing it lazily if needed).
+    Returns 503 with per-dependency details until everything is usable.
+    """
+    def check_github():
+        missing = [n for n in ("GITHUB_REPO", "GITHUB_TOKEN", "FILE_PATH") if not os.getenv(n)]
+        if missing:
+            raise RuntimeError(f"Missing env: {', '.join(missing)}")
+
+    checks = {
+        "mongodb": mongodb.ping,
+        "gemini": Model.get_client,
+        "github": check_github,
+    }
+
+    results = {}
+    for name, check in checks.items():
+        started = time.perf_counter()
+        try:
+            check()
+            results[name] = {"ok": True}
+        except Exception as e:
+            results[name] = {"ok": False, "error": str(e)}
+        results[name]["ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    ready = all(r["ok"] for r in results.values())
+    return ORJSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "checks": results},
+    )
+
+
 @app.get("/outputs")
 def get_all_outputs():
-    global agent_outputs
-    if not agent_outputs or not len(agent_outputs):
+    # outputs are published by the orchestrator to the shared store,
+    # so any worker / replica can serve them
+    agent_outputs = get_store().get_all()
+    if not agent_outputs:
         raise HTTPException(status_code=404, detail="No agent outputs available yet.")
-    return JSONResponse(content=dict(agent_outputs))
+    return ORJSONResponse(content=agent_outputs)
 
 
 @app.get("/outputs/{agent_name}")
 def get_agent_output(agent_name: str):
-    global agent_outputs
     key = f"{agent_name}_Output"
-    if not agent_outputs or key not in agent_outputs:
+    output = get_store().get(key)
+    if output is None:
         raise HTTPException(status_code=404, detail=f"No output found for {agent_name}")
-    return JSONResponse(content=agent_outputs[key])
+    return ORJSONResponse(content=output)
+
+
+@app.get("/outputs/{agent_name}/history")
+def get_agent_output_history(agent_name: str, since: str | None = None, limit: int = 100):
+    """
+    Past outputs of one agent, oldest first: the newest `limit` entries, or the
+    first `limit` entries after `since` when given.
+    `since` is a unix timestamp or ISO-8601 datetime (UTC if no offset).
+    Example: /outputs/Agent1/history?since=2025-01-01T00:00:00Z&limit=50
+    """
+    since_ts = None
+    if since is not None:
+        try:
+            since_ts = float(since)
+        except ValueError:
+            try:
+                parsed = datetime.fromisoformat(since.replace("Z", "+00:00"))
+            except ValueError:
+                raise HTTPException(status_code=400, detail="since must be a unix timestamp or ISO-8601 datetime")
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            since_ts = parsed.timestamp()
+
+    history = get_store().get_history(f"{agent_name}_Output", since=since_ts, limit=max(1, min(limit, 1000)))
+    return ORJSONResponse(content={"agent": agent_name, "count": len(history), "history": history})
+
+
+@app.get("/github/stats")
+def get_github_stats():
+    """
+    GitHub client metrics for this worker: per-operation latency, retries,
+    rate-limit waits / remaining quota, and how many TCP+TLS handshakes were paid.
+    """
+    return github_store.stats()
+
+
+@app.get("/admission/stats")
+def get_admission_stats():
+    """Per route group: running / waiting requests, limits, and how many were rejected (429)."""
+    return admission.stats()
+
+
+@app.post("/profile/agents/next-cycle")
+def profile_next_agent_cycle(x_profile: str | None = Header(None)):
+    """Profile the orchestrator's next cycle (admin: X-Profile: <PROFILE_TOKEN>)."""
+    if not profiler.is_authorized(x_profile):
+        raise HTTPException(status_code=403, detail="Profiling is disabled or the token is invalid")
+    profiler.request_next_cycle()
+    return {"message": "The next agent cycle will be profiled.", "profile_dir": profiler.PROFILE_DIR}
+
+
+@app.on_event("startup")
+def configure_llm_quota():
+    # each API worker is one of the interactive processes sharing the Gemini quota
+    llm_gateway.configure(llm_gateway.INTERACTIVE)
+
+
+@app.on_event("shutdown")
+async def close_github_client():
+    await github_store.aclose()
+
+
+@app.get("/orchestrator/status")
+def get_orchestrator_status():
+    """
+    Which instance currently leads the agent schedule, whether its lease is live,
+    and metadata of the latest cycle (number, start time, duration, per-agent result).
+    """
+    try:
+        return lease_status()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 class Job(BaseModel):
@@ -117,22 +325,31 @@ class AssessmentAnswers(BaseModel):
 class StatusUpdate(BaseModel):
     status: str  # "Onboarding" | "Pending" | "Rejected"
 
+class BulkStatusItem(BaseModel):
+    id: str
+    status: str
+
+class BulkStatusUpdate(BaseModel):
+    updates: list[BulkStatusItem]
+
 class ChatRequest(BaseModel):
     message: str
 
 class BlockInput(BaseModel):
     data: dict   # block inner content WITHOUT block_no
 
+# LLM-backed endpoints are plain `def` so FastAPI runs them in the threadpool;
+# waiting on the LLM rate limiter must not block the event loop.
 @app.post("/chat")
-async def chat_endpoint(request: ChatRequest):
+def chat_endpoint(request: ChatRequest):
     """
-    Gemini chatbot endpoint.
+    Gemini chatbot endpoint, grounded in the HR dataset and latest agent outputs.
     Receives: { "message": "hi" }
-    Returns: { "response": "Hello! How can I help?" }
+    Returns: { "response": "Hello! How can I help?", "sources": ["hr_data", ...] }
     """
     try:
-        reply = ask_gemini(request.message)
-        return {"response": reply}
+        reply, snippets = ask_hr_assistant(request.message)
+        return {"response": reply, "sources": sorted({s["source"] for s in snippets})}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -146,15 +363,10 @@ async def add_job(job: Job):
     try:
         new_job = job.dict()  # convert Pydantic model to dict
 
-        headers = {"Authorization": f"token {GITHUB_TOKEN}"}
-        url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{FILE_PATH}"
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
+        fetched = await github_store.read_file(FILE_PATH)
+        if fetched is None:
             raise HTTPException(status_code=500, detail="Failed to fetch jobs.json from GitHub.")
-
-        data = response.json()
-        sha = data["sha"]
-        file_content = base64.b64decode(data["content"]).decode("utf-8")
+        file_content, sha = fetched
 
         try:
             jobs_data = json.loads(file_content)
@@ -167,19 +379,8 @@ async def add_job(job: Job):
         new_job["id"] = new_id
         jobs_data["jobs"].append(new_job)
 
-        updated_content = json.dumps(jobs_data, indent=2)
-        encoded_content = base64.b64encode(updated_content.encode()).decode()
-
         commit_message = f"Added new job: {new_job.get('title', 'Untitled')}"
-        update_data = {
-            "message": commit_message,
-            "content": encoded_content,
-            "sha": sha,
-            "branch": "main"
-        }
-
-        update_response = requests.put(url, headers=headers, data=json.dumps(update_data))
-        if update_response.status_code not in [200, 201]:
+        if not await github_store.write_file(FILE_PATH, json.dumps(jobs_data, indent=2), sha, commit_message):
             raise HTTPException(status_code=500, detail="Failed to update jobs.json on GitHub.")
 
         return {"message": "Job added successfully!", "job_id": new_id}
@@ -189,125 +390,69 @@ async def add_job(job: Job):
 
 
 @app.get("/getjobs")
-def get_jobs():
+async def get_jobs():
     """
     Fetch all job listings from the jobs.json file stored in the GitHub repository.
     Returns the JSON content of the file.
     """
     try:
-        headers = {"Authorization": f"token {GITHUB_TOKEN}"}
-        url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{FILE_PATH}"
-        response = requests.get(url, headers=headers)
-
-        if response.status_code != 200:
+        fetched = await github_store.read_file(FILE_PATH)
+        if fetched is None:
             raise HTTPException(status_code=500, detail="Failed to fetch jobs.json from GitHub.")
 
-        data = response.json()
-        file_content = base64.b64decode(data["content"]).decode("utf-8")
-
         try:
-            jobs_data = json.loads(file_content)
+            jobs_data = json.loads(fetched[0])
         except Exception:
             raise HTTPException(status_code=500, detail="Failed to parse jobs.json content.")
 
-        return JSONResponse(content=jobs_data)
+        return ORJSONResponse(content=jobs_data)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-# ✅ NEW: helper to get job description from jobs.json (GitHub)
-def fetch_job_description(job_id: str) -> str:
-    """
-    Fetch jobs.json from GitHub and return the description for a given job_id.
-
-    job_id is stored as string in MongoDB (from /applications),
-    but jobs.json has numeric id. We convert.
-    """
-    try:
-        job_id_int = int(job_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid job_id stored in application")
-
-    headers = {"Authorization": f"token {GITHUB_TOKEN}"}
-    url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{FILE_PATH}"
-    response = requests.get(url, headers=headers)
-
-    if response.status_code != 200:
-        raise HTTPException(status_code=500, detail="Failed to fetch jobs.json from GitHub.")
-
-    data = response.json()
-    file_content = base64.b64decode(data["content"]).decode("utf-8")
-
-    try:
-        jobs_data = json.loads(file_content)
-        job_list = jobs_data.get("jobs", [])
-    except Exception:
-        raise HTTPException(status_code=500, detail="Failed to parse jobs.json content.")
-
-    for job in job_list:
-        if job.get("id") == job_id_int:
-            return job.get("description", "")
-
-    raise HTTPException(status_code=404, detail=f"Job description not found for id {job_id}")
-
 @app.get("/chain")
-def get_chain():
+async def get_chain():
     """
     Fetch chain.json from GitHub and return its parsed contents.
     """
     try:
-        headers = {"Authorization": f"token {GITHUB_TOKEN}"}
-        url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{os.getenv('CHAIN_FILE_PATH')}"
-
-        response = requests.get(url, headers=headers)
-
-        if response.status_code != 200:
+        fetched = await github_store.read_file(CHAIN_FILE_PATH)
+        if fetched is None:
             raise HTTPException(
                 status_code=500,
                 detail="Failed to fetch chain.json from GitHub."
             )
 
-        data = response.json()
-
-        # GitHub returns base64 encoded file content
-        file_content = base64.b64decode(data["content"]).decode("utf-8")
-
         try:
-            chain_data = json.loads(file_content)
+            chain_data = await run_in_threadpool(json.loads, fetched[0])
         except Exception:
             raise HTTPException(
                 status_code=500,
                 detail="Failed to parse chain.json content."
             )
 
-        return JSONResponse(content=chain_data)
+        return ORJSONResponse(content=chain_data)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
 @app.post("/addBlock")
-def add_block(payload: BlockInput):
+async def add_block(payload: BlockInput):
     """
     Append a new block to chain.json stored in GitHub.
     Auto-calculates block_no = len(chain).
     """
     try:
-        headers = {"Authorization": f"token {GITHUB_TOKEN}"}
-        file_path = os.getenv("CHAIN_FILE_PATH")
-        url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{file_path}"
-
         # Step 1 → Fetch existing chain.json
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
+        fetched = await github_store.read_file(CHAIN_FILE_PATH)
+        if fetched is None:
             raise HTTPException(500, "Failed to fetch chain.json from GitHub")
+        file_content, sha = fetched
 
-        data = response.json()
-        sha = data["sha"]
-        file_content = base64.b64decode(data["content"]).decode("utf-8")
-        
-        # Parse JSON
-        chain_data = json.loads(file_content)
+        # Parse JSON (off the event loop: chain.json grows with every block)
+        chain_data = await run_in_threadpool(json.loads, file_content)
 
         if "chain" not in chain_data or not isinstance(chain_data["chain"], list):
             raise HTTPException(500, "Invalid chain.json structure")
@@ -324,32 +469,66 @@ def add_block(payload: BlockInput):
         # Step 3 → Append new block
         chain.append(new_block)
 
-        # Step 4 → Encode & write back
-        updated_content = json.dumps({"chain": chain}, indent=2)
-        encoded = base64.b64encode(updated_content.encode()).decode()
-
+        # Step 4 → Write back
+        updated_content = await run_in_threadpool(json.dumps, {"chain": chain}, indent=2)
         commit_msg = f"Added block #{new_block_no}"
 
-        update_body = {
-            "message": commit_msg,
-            "content": encoded,
-            "sha": sha,
-            "branch": "main"
-        }
-
-        update_res = requests.put(url, headers=headers, data=json.dumps(update_body))
-        if update_res.status_code not in [200, 201]:
+        if not await github_store.write_file(CHAIN_FILE_PATH, updated_content, sha, commit_msg):
             raise HTTPException(500, "Failed to update chain.json on GitHub")
 
+        # Step 5 → Update Merkle tree (only the new leaf is hashed, unless history was rewritten)
+        tree = await run_in_threadpool(sync_chain_tree, chain)
+
         return {
             "message": f"Block #{new_block_no} added!",
-            "block": new_block
+            "block": new_block,
+            "merkle_root": tree.root,
         }
 
     except Exception as e:
         raise HTTPException(500, str(e))
 
 
+def _block_proof(chain_json: str, block_no: int) -> dict | None:
+    chain = json.loads(chain_json).get("chain", [])
+    if block_no < 0 or block_no >= len(chain):
+        return None
+
+    tree = sync_chain_tree(chain)
+    return {
+        "block_no": block_no,
+        "block": chain[block_no],
+        "leaf": tree.leaf(block_no),
+        "proof": tree.proof(block_no),
+        "merkle_root": tree.root,
+        "chain_length": len(tree),
+    }
+
+
+@app.get("/chain/proof/{block_no}")
+async def get_block_proof(block_no: int):
+    """
+    Return a Merkle inclusion proof for a block in chain.json.
+    Verify with merkle.verify_proof(leaf, proof, root) or the same
+    hash/combineHash steps in merkle.js.
+    """
+    try:
+        fetched = await github_store.read_file(CHAIN_FILE_PATH)
+        if fetched is None:
+            raise HTTPException(500, "Failed to fetch chain.json from GitHub")
+
+        # parsing + a possible full Merkle rebuild run in the threadpool, not on the event loop
+        proof = await run_in_threadpool(_block_proof, fetched[0], block_no)
+        if proof is None:
+            raise HTTPException(404, f"Block #{block_no} not found")
+        return proof
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(500, str(e))
+
+
 @app.put("/updatejob/{job_id}")
 async def update_job(job_id: int, updated_job: Job):
     """
@@ -357,17 +536,11 @@ async def update_job(job_id: int, updated_job: Job):
     The entire job entry is replaced with the new data, preserving the ID.
     """
     try:
-        headers = {"Authorization": f"token {GITHUB_TOKEN}"}
-        url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{FILE_PATH}"
-
         # Step 1: Fetch current jobs.json from GitHub
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
+        fetched = await github_store.read_file(FILE_PATH)
+        if fetched is None:
             raise HTTPException(status_code=500, detail="Failed to fetch jobs.json from GitHub.")
-
-        data = response.json()
-        sha = data["sha"]
-        file_content = base64.b64decode(data["content"]).decode("utf-8")
+        file_content, sha = fetched
 
         try:
             jobs_data = json.loads(file_content)
@@ -393,19 +566,8 @@ async def update_job(job_id: int, updated_job: Job):
             raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found.")
 
         # Step 3: Commit updated file back to GitHub
-        updated_content = json.dumps(jobs_data, indent=2)
-        encoded_content = base64.b64encode(updated_content.encode()).decode()
-
         commit_message = f"Updated job ID {job_id}: {updated_job.title}"
-        update_data = {
-            "message": commit_message,
-            "content": encoded_content,
-            "sha": sha,
-            "branch": "main"
-        }
-
-        update_response = requests.put(url, headers=headers, data=json.dumps(update_data))
-        if update_response.status_code not in [200, 201]:
+        if not await github_store.write_file(FILE_PATH, json.dumps(jobs_data, indent=2), sha, commit_message):
             raise HTTPException(status_code=500, detail="Failed to update jobs.json on GitHub.")
 
         return {"message": f"Job ID {job_id} updated successfully!"}
@@ -415,22 +577,16 @@ async def update_job(job_id: int, updated_job: Job):
 
 
 @app.delete("/deletejob/{job_id}")
-def delete_job(job_id: int):
+async def delete_job(job_id: int):
     """
     Deletes a job entry from jobs.json in the GitHub repository using its ID.
     """
     try:
-        headers = {"Authorization": f"token {GITHUB_TOKEN}"}
-        url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{FILE_PATH}"
-
         # Step 1: Fetch the existing jobs.json from GitHub
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
+        fetched = await github_store.read_file(FILE_PATH)
+        if fetched is None:
             raise HTTPException(status_code=500, detail="Failed to fetch jobs.json from GitHub.")
-
-        data = response.json()
-        sha = data["sha"]
-        file_content = base64.b64decode(data["content"]).decode("utf-8")
+        file_content, sha = fetched
 
         try:
             jobs_data = json.loads(file_content)
@@ -446,20 +602,9 @@ def delete_job(job_id: int):
         if len(jobs_data["jobs"]) == original_len:
             raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found.")
 
-        # Step 3: Encode and push the updated file back to GitHub
-        updated_content = json.dumps(jobs_data, indent=2)
-        encoded_content = base64.b64encode(updated_content.encode()).decode()
-
+        # Step 3: Push the updated file back to GitHub
         commit_message = f"Deleted job ID {job_id}"
-        update_data = {
-            "message": commit_message,
-            "content": encoded_content,
-            "sha": sha,
-            "branch": "main"
-        }
-
-        update_response = requests.put(url, headers=headers, data=json.dumps(update_data))
-        if update_response.status_code not in [200, 201]:
+        if not await github_store.write_file(FILE_PATH, json.dumps(jobs_data, indent=2), sha, commit_message):
             raise HTTPException(status_code=500, detail="Failed to update jobs.json on GitHub.")
 
         return {"message": f"Job ID {job_id} deleted successfully!"}
@@ -469,7 +614,7 @@ def delete_job(job_id: int):
 
 
 @app.post("/applications")
-async def submit_application(
+def submit_application(
     job_id: str = Form(...),
     job_title: str | None = Form(None),
     full_name: str = Form(...),
@@ -480,23 +625,31 @@ async def submit_application(
     """
     Receive application form + resume file as multipart/form-data,
     extract text using extracttext.py, and store only the text in MongoDB.
+    A file that was uploaded before (same SHA-256) reuses its extracted text.
+    Plain `def`: the hash lookup, parsing and insert all block, so FastAPI runs
+    this in its threadpool instead of on the event loop.
     """
     try:
-        # 1️⃣ Save uploaded file to a temporary location
-        # Keep correct extension so extracttext.py can decide how to parse
-        suffix = os.path.splitext(resume.filename)[1] or ".pdf"
-
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp.write(await resume.read())
-            tmp_path = tmp.name
-
-        try:
-            # 2️⃣ Extract text using your extracttext.py helper
-            resume_text = extract_text(tmp_path)
-        finally:
-            # 3️⃣ Clean up temporary file
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
+        data = resume.file.read()
+        content_hash = resume_hash(data)
+        resume_text = get_cached_resume_texts([content_hash]).get(content_hash)
+
+        if resume_text is None:
+            # 1️⃣ Save uploaded file to a temporary location
+            # Keep correct extension so extracttext.py can decide how to parse
+            suffix = os.path.splitext(resume.filename)[1] or ".pdf"
+
+            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+                tmp.write(data)
+                tmp_path = tmp.name
+
+            try:
+                # 2️⃣ Extract text using your extracttext.py helper
+                resume_text = extract_text(tmp_path)
+            finally:
+                # 3️⃣ Clean up temporary file
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
 
         # 4️⃣ Store extracted text in MongoDB (matches mongodb.create_application)
         application_id = create_application(
@@ -508,6 +661,7 @@ async def submit_application(
             resume_text=resume_text,   # ✅ send text, not bytes
             resume_filename=resume.filename,
             resume_content_type=resume.content_type or "application/octet-stream",
+            resume_hash=content_hash,
         )
 
         return {
@@ -519,6 +673,212 @@ async def submit_application(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/applications/bulk")
+def bulk_import_applications(
+    archive: UploadFile = File(...),
+    manifest: UploadFile = File(...),
+):
+    """
+    Bulk-import applications from a zip of CVs (.pdf/.docx/.txt) plus a CSV manifest.
+
+    Manifest columns: filename, name, phone, years_exp, job_id (job_title optional).
+    Zip entries are read once and hashed; files whose text is already stored
+    (or that repeat inside the archive) are not parsed again. The rest are
+    streamed to a process pool as they are read, and applications are written
+    in batches.
+    """
+    started = time.perf_counter()
+    failures = []
+    imported_ids = []
+
+    try:
+        # 1️⃣ Parse manifest → rows keyed by file name
+        reader = csv.DictReader(io.TextIOWrapper(manifest.file, encoding="utf-8-sig"))
+        required = {"filename", "name", "phone", "years_exp", "job_id"}
+        missing_cols = required - set(reader.fieldnames or [])
+        if missing_cols:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Manifest is missing columns: {', '.join(sorted(missing_cols))}",
+            )
+
+        rows = {}
+        rejected_rows = set()   # already reported above; skip their archive entries silently
+        for line_no, row in enumerate(reader, start=2):
+            filename = os.path.basename((row.get("filename") or "").strip())
+            if filename in rows or filename in rejected_rows:
+                failures.append({"file": filename, "error": f"Duplicate file name on manifest line {line_no}"})
+                continue
+            try:
+                years_exp = int(row["years_exp"])
+            except (TypeError, ValueError):
+                failures.append({"file": filename, "error": f"Invalid years_exp on manifest line {line_no}"})
+                rejected_rows.add(filename)
+                continue
+            rows[filename] = {
+                "job_id": (row.get("job_id") or "").strip(),
+                "job_title": (row.get("job_title") or "").strip() or None,
+                "full_name": (row.get("name") or "").strip(),
+                "phone": (row.get("phone") or "").strip(),
+                "years_exp": years_exp,
+            }
+
+        try:
+            zf = zipfile.ZipFile(archive.file)
+        except zipfile.BadZipFile:
+            raise HTTPException(status_code=400, detail="archive is not a valid zip file")
+
+        # 2️⃣ One pass over the zip: each entry is read once, hashed, and either
+        # resolved from stored text or sent to the process pool with the same bytes
+        pending_docs = []
+        seen = set()
+        known_texts = {}   # hash → extracted text (from Mongo or parsed in this import)
+
+        def flush():
+            nonlocal pending_docs
+            if not pending_docs:
+                return
+            docs, pending_docs = pending_docs, []
+            # a failed batch is reported per file; the import goes on with the next one
+            try:
+                result = create_applications_bulk(docs)
+            except Exception as e:
+                failures.extend({"file": d["resume_filename"], "error": f"Insert failed: {e}"} for d in docs)
+                return
+            imported_ids.extend(result["inserted_ids"])
+            failures.extend(
+                {"file": docs[err["index"]]["resume_filename"], "error": f"Insert failed: {err['error']}"}
+                for err in result["errors"]
+            )
+
+        def add_doc(filename, content_hash, resume_text):
+            pending_docs.append({
+                **rows[filename],
+                "resume_text": resume_text,
+                "resume_filename": filename,
+                "resume_content_type": mimetypes.guess_type(filename)[0] or "application/octet-stream",
+                "resume_hash": content_hash,
+            })
+            if len(pending_docs) >= BULK_IMPORT_BATCH_SIZE:
+                flush()
+
+        def collect(done):
+            for future in done:
+                content_hash, filenames = in_flight.pop(future)
+                extracting.pop(content_hash, None)
+                try:
+                    resume_text = future.result()
+                except Exception as e:
+                    failures.extend({"file": filename, "error": str(e)} for filename in filenames)
+                    continue
+                known_texts[content_hash] = resume_text
+                for filename in filenames:
+                    add_doc(filename, content_hash, resume_text)
+
+        def dispatch(batch):
+            # one cache lookup per small batch of entries, then parse only the misses
+            unknown = [h for _, h, _ in batch if h not in known_texts and h not in extracting]
+            known_texts.update(get_cached_resume_texts(unknown))
+
+            for filename, content_hash, data in batch:
+                if content_hash in known_texts:
+                    add_doc(filename, content_hash, known_texts[content_hash])
+                elif content_hash in extracting:
+                    in_flight[extracting[content_hash]][1].append(filename)
+                else:
+                    future = pool.submit(extract_text_from_bytes, filename, data)
+                    in_flight[future] = (content_hash, [filename])
+                    extracting[content_hash] = future
+
+                if len(in_flight) >= BULK_IMPORT_WORKERS * 2:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+
+        with zf, ProcessPoolExecutor(max_workers=BULK_IMPORT_WORKERS) as pool:
+            in_flight = {}    # future → (hash, [file names waiting on it])
+            extracting = {}   # hash → future, so identical files are parsed once
+            batch = []        # (file name, hash, bytes) awaiting the cache lookup
+            for info in zf.infolist():
+                filename = os.path.basename(info.filename)
+                if info.is_dir() or not filename or info.filename.startswith("__MACOSX/"):
+                    continue
+
+                if filename in rejected_rows and filename not in rows:
+                    continue
+                if os.path.splitext(filename)[1].lower() not in SUPPORTED_RESUME_EXTS:
+                    failures.append({"file": filename, "error": "Unsupported file type"})
+                    continue
+                if filename not in rows:
+                    failures.append({"file": filename, "error": "Not listed in manifest"})
+                    continue
+                if filename in seen:
+                    failures.append({"file": info.filename, "error": "Duplicate file name in archive"})
+                    continue
+                if info.file_size > BULK_IMPORT_MAX_FILE_BYTES:
+                    failures.append({"file": filename, "error": "File too large"})
+                    continue
+
+                seen.add(filename)
+                data = zf.read(info)
+                batch.append((filename, resume_hash(data), data))
+                if len(batch) >= BULK_IMPORT_WORKERS * 2:
+                    dispatch(batch)
+                    batch = []
+
+            dispatch(batch)
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+
+        # 3️⃣ Write the remainder
+        flush()
+
+        for filename in rows.keys() - seen:
+            failures.append({"file": filename, "error": "Listed in manifest but not found in archive"})
+
+        elapsed = time.perf_counter() - started
+        processed = len(imported_ids) + len(failures)
+        return {
+            "message": f"Imported {len(imported_ids)} applications.",
+            "imported": len(imported_ids),
+            "failed": len(failures),
+            "failures": failures,
+            "elapsed_sec": round(elapsed, 3),
+            "files_per_sec": round(processed / elapsed, 2) if elapsed > 0 else None,
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ⚠️ must be declared before /applications/{job_id} so "search" isn't taken as a job_id
+@app.get("/applications/search")
+def search_applications_api(
+    q: str,
+    job_id: str | None = None,
+    status: str | None = None,
+    min_years: int | None = None,
+    limit: int = 20,
+):
+    """
+    Ranked full-text search over applicant resumes.
+    Example: /applications/search?q=kubernetes&min_years=5&job_id=3
+    """
+    try:
+        results = search_applications(
+            query=q,
+            job_id=job_id,
+            status=status,
+            min_years=min_years,
+            limit=max(1, min(limit, 100)),
+        )
+        return ORJSONResponse(content={"query": q, "count": len(results), "results": results})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/applications/{job_id}")
 def list_applications(job_id: str):
     """
@@ -526,7 +886,172 @@ def list_applications(job_id: str):
     """
     try:
         apps = get_applications_by_job_id(job_id)
-        return {"job_id": job_id, "applications": apps}
+        return ORJSONResponse(content={"job_id": job_id, "applications": apps})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        value = orjson.dumps(value, default=str).decode("utf-8")
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value   # applicant-supplied text must not become a formula
+    return value
+
+
+def _export_chunks(rows, fmt: str, fields: list):
+    """Encode rows as NDJSON / CSV, yielding ~EXPORT_CHUNK_BYTES at a time."""
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(fields)
+        yield buf.getvalue().encode("utf-8")   # header goes out before the first query
+        buf.seek(0)
+        buf.truncate()
+        for row in rows:
+            writer.writerow([_csv_cell(row[f]) for f in fields])
+            if buf.tell() >= EXPORT_CHUNK_BYTES:
+                yield buf.getvalue().encode("utf-8")
+                buf.seek(0)
+                buf.truncate()
+        if buf.tell():
+            yield buf.getvalue().encode("utf-8")
+        return
+
+    chunk = bytearray()
+    first = True
+    for row in rows:
+        chunk += orjson.dumps(row, default=str)
+        chunk += b"\n"
+        if first or len(chunk) >= EXPORT_CHUNK_BYTES:
+            yield bytes(chunk)
+            chunk.clear()
+            first = False
+    if chunk:
+        yield bytes(chunk)
+
+
+@app.get("/applications/{job_id}/export")
+def export_applications(
+    job_id: str,
+    fmt: str = Query("ndjson", alias="format"),
+    fields: str | None = None,
+):
+    """
+    Stream every application of a job as NDJSON or CSV (no resume text).
+    `fields` is a comma-separated subset of the export columns (default: all).
+    Rows come from a batched cursor and are written as they arrive, so memory
+    use doesn't grow with the number of applicants.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+
+    selected = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(EXPORT_FIELDS)
+    unknown = [f for f in selected if f not in EXPORT_FIELDS]
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown) or '(none given)'}; available: {', '.join(EXPORT_FIELDS)}",
+        )
+    selected = list(dict.fromkeys(selected))
+
+    rows = iter_applications_for_export(job_id, selected)
+    filename = f"applications-{re.sub(r'[^A-Za-z0-9_.-]', '_', job_id)}.{fmt}"
+    return StreamingResponse(
+        _export_chunks(rows, fmt, selected),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@app.get("/analytics/funnel")
+def funnel_metrics():
+    """
+    Hiring funnel across all jobs: applications per day, status counts and
+    transitions, assessment score distribution. Read from a rollup document
+    that writes keep current, so cost doesn't grow with history.
+    """
+    try:
+        return get_funnel_metrics()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/applications/{job_id}/stats")
+def application_stats(job_id: str):
+    """
+    Per-status application counts for a job (Pending / Onboarding / Rejected),
+    computed by an indexed aggregation instead of listing every application.
+    """
+    try:
+        return get_application_stats(job_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/applications/{job_id}/ranked")
+def list_ranked_applications(job_id: str, limit: int = 50, offset: int = 0):
+    """
+    Rank all applications for a job by similarity to the job description.
+
+    Scores are cached per application against a fingerprint of the description,
+    so only new applications (or all of them, after the description changes)
+    have their resume text loaded and scored.
+    """
+    try:
+        # NumPy is only needed here → import on first use to keep cold start fast
+        from prescreen import job_fingerprint, score_resumes
+
+        job_description = fetch_job_description(job_id)
+        job_hash = job_fingerprint(job_description)
+
+        candidates = get_prescreen_candidates(job_id)
+
+        stale_ids = [
+            str(doc["_id"])
+            for doc in candidates
+            if (doc.get("prescreen") or {}).get("job_hash") != job_hash
+        ]
+
+        fresh_scores = {}
+        if stale_ids:
+            texts = get_resume_texts(stale_ids)
+            ids = list(texts.keys())
+            scores = score_resumes(job_description, [texts[i] for i in ids])
+            fresh_scores = {i: round(float(s), 4) for i, s in zip(ids, scores)}
+            save_prescreen_scores(job_hash, fresh_scores)
+
+        ranked = []
+        for doc in candidates:
+            app_id = str(doc["_id"])
+            score = fresh_scores.get(app_id)
+            if score is None:
+                score = (doc.get("prescreen") or {}).get("score", 0.0)
+            ranked.append({
+                "id": app_id,
+                "job_title": doc.get("job_title"),
+                "full_name": doc.get("full_name"),
+                "years_exp": doc.get("years_exp"),
+                "status": doc.get("status"),
+                "created_at": doc.get("created_at").isoformat() if doc.get("created_at") else None,
+                "score": score,
+            })
+
+        ranked.sort(key=lambda a: a["score"], reverse=True)
+
+        return ORJSONResponse(content={
+            "job_id": job_id,
+            "total": len(ranked),
+            "rescored": len(fresh_scores),
+            "applications": ranked[offset:offset + limit],
+        })
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -553,70 +1078,55 @@ def update_application_status_api(application_id: str, payload: StatusUpdate):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.patch("/applications/status")
+def bulk_update_application_status_api(payload: BulkStatusUpdate):
+    """
+    Update the status of many applications in one request.
+    Body: { "updates": [ { "id": "...", "status": "Rejected" }, ... ] }
+    """
+    if len(payload.updates) > BULK_STATUS_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {BULK_STATUS_MAX_ITEMS} updates per request.",
+        )
+
+    try:
+        result = update_application_statuses([u.dict() for u in payload.updates])
+        return {"message": "Statuses updated", **result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 
-# ✅ NEW: per-application Agent4 integration (generate questions)
-@app.post("/applications/{application_id}/assessment/start")
-def start_assessment(application_id: str):
+# ✅ per-application Agent4 integration (generate questions) → background task
+@app.post("/applications/{application_id}/assessment/start", status_code=202)
+def start_assessment(application_id: str, idempotency_key: str | None = Header(None)):
     """
-    Generate assessment questions for this application using Agent4.
+    Queue assessment question generation for this application (Agent4).
 
-    - Reads application from Mongo (job_id, full_name, years_exp, resume_text)
-    - Fetches job description from GitHub (jobs.json)
-    - Builds combined applicant_cv text
-    - Calls Agent4.generate_assessment(...)
-    - Saves questions on this application
-    - Returns questions for the frontend to render
+    Returns 202 with a task id right away; poll /tasks/{task_id} for the
+    questions. Repeated calls with the same Idempotency-Key header return the
+    same task. The default key is versioned by the application's current
+    questions: calls coalesce while a generation is pending, and once it has
+    stored new questions, the next call starts a fresh generation.
     """
     try:
-        app_doc = get_application_by_id(application_id)
+        with span("mongo_read"):
+            app_doc = get_application_by_id(application_id)
         if not app_doc:
             raise HTTPException(status_code=404, detail="Application not found")
 
-        job_id = app_doc.get("job_id")
-        job_title = app_doc.get("job_title", "")
-        full_name = app_doc.get("full_name", "")
-        phone = app_doc.get("phone", "")
-        years_exp = app_doc.get("years_exp", "")
-        resume_text = app_doc.get("resume_text", "")
-
-        if not job_id:
-            raise HTTPException(status_code=400, detail="Application has no job_id")
-
-        # 1️⃣ Get job description from GitHub
-        job_description = fetch_job_description(job_id)
-
-        # 2️⃣ Build combined applicant_cv text for Agent4
-        profile_lines = [
-            f"Job ID: {job_id}",
-            f"Job Title: {job_title}",
-            f"Candidate Name: {full_name}",
-            f"Phone: {phone}",
-            f"Years of Experience: {years_exp}",
-            "",
-            "Resume Content:",
-            resume_text,
-        ]
-        applicant_cv_text = "\n".join(line for line in profile_lines if line)
-
-        # 3️⃣ Ask Agent4 to generate questions (returns JSON string)
-        questions_json_str = generate_assessment(
-            job_description=job_description,
-            applicant_cv=applicant_cv_text,
-        )
-
-        questions = json.loads(questions_json_str)
-
-        # 4️⃣ Save them in Mongo on this application
-        save_assessment_for_application(
-            application_id=application_id,
-            questions=questions,
+        questions = app_doc.get("assessment_questions")
+        version = (
+            hashlib.sha256(json.dumps(questions, sort_keys=True, default=str).encode()).hexdigest()[:16]
+            if questions else "none"
         )
-
-        # 5️⃣ Return to frontend
-        return {
-            "application_id": application_id,
-            "questions": questions,
-        }
+        with span("enqueue"):
+            task = get_queue().enqueue(
+                "assessment.start",
+                {"application_id": application_id},
+                idempotency_key=idempotency_key or f"assessment.start:{application_id}:{version}",
+            )
+        return _task_accepted(task)
 
     except HTTPException:
         raise
@@ -624,50 +1134,76 @@ def start_assessment(application_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-# ✅ NEW: per-application Agent4 integration (evaluate answers)
-@app.post("/applications/{application_id}/assessment/submit")
-def submit_assessment(application_id: str, payload: AssessmentAnswers):
+# ✅ per-application Agent4 integration (evaluate answers) → background task
+@app.post("/applications/{application_id}/assessment/submit", status_code=202)
+def submit_assessment(
+    application_id: str,
+    payload: AssessmentAnswers,
+    idempotency_key: str | None = Header(None),
+):
     """
-    Receive candidate answers, evaluate using Agent4,
-    and save answers + result into the same application document.
+    Queue evaluation of the candidate's answers (Agent4).
+    Answers + result are saved on the application when the task finishes;
+    the same answers submitted twice map to the same task.
     """
     try:
-        app_doc = get_application_by_id(application_id)
+        with span("mongo_read"):
+            app_doc = get_application_by_id(application_id)
         if not app_doc:
             raise HTTPException(status_code=404, detail="Application not found")
 
-        questions = app_doc.get("assessment_questions")
-        if not questions:
+        if not app_doc.get("assessment_questions"):
             raise HTTPException(
                 status_code=400,
                 detail="No assessment questions found for this application",
             )
 
-        # 1️⃣ JSON strings for Agent4
-        questions_str = json.dumps(questions)
-        answers_str = json.dumps(payload.answers)
+        answers_hash = hashlib.sha256(json.dumps(payload.answers, sort_keys=True).encode()).hexdigest()
+        with span("enqueue"):
+            task = get_queue().enqueue(
+                "assessment.submit",
+                {"application_id": application_id, "answers": payload.answers},
+                idempotency_key=idempotency_key or f"assessment.submit:{application_id}:{answers_hash}",
+            )
+        return _task_accepted(task)
 
-        # 2️⃣ Call Agent4 to evaluate
-        result_json_str = evaluate_responses(
-            questions_with_answers=questions_str,
-            user_responses=answers_str,
-        )
-        result = json.loads(result_json_str)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # 3️⃣ Save answers + result
-        save_assessment_for_application(
-            application_id=application_id,
-            questions=questions,
-            answers=payload.answers,
-            result=result,
-        )
 
-        # 4️⃣ Return result
+def _task_accepted(task: dict) -> ORJSONResponse:
+    return ORJSONResponse(
+        status_code=202,
+        content={
+            "task_id": task["id"],
+            "status": task["status"],
+            "status_url": f"/tasks/{task['id']}",
+        },
+    )
+
+
+@app.get("/tasks/{task_id}")
+def get_task_status(task_id: str):
+    """
+    Status of a background task: queued | running | succeeded | failed.
+    `result` holds the handler output once succeeded.
+    """
+    try:
+        task = get_queue().get(task_id)
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
         return {
-            "application_id": application_id,
-            "result": result,
+            "task_id": task["id"],
+            "kind": task["kind"],
+            "status": task["status"],
+            "attempts": task["attempts"],
+            "result": task["result"],
+            "error": task["error"],
+            "created_at": task["created_at"],
+            "updated_at": task["updated_at"],
         }
-
     except HTTPException:
         raise
     except Exception as e:
@@ -675,43 +1211,33 @@ def submit_assessment(application_id: str, payload: AssessmentAnswers):
 
 
 @app.post("/agent/assessment/generate")
-async def api_generate_assessment(payload: AssessmentRequest):
+def api_generate_assessment(payload: AssessmentRequest):
     """
     Use Agent4 to generate a 20-question assessment
     from job description + applicant CV.
     """
     try:
-        # Agent4 expects plain strings
-        questions_json_str = generate_assessment(
+        questions = generate_assessment(
             job_description=payload.job_description,
             applicant_cv=payload.applicant_cv,
         )
-
-        # Agent4 returns a JSON string → convert to dict before sending
-        questions = json.loads(questions_json_str)
-        return JSONResponse(content=questions)
+        return ORJSONResponse(content=questions)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/agent/assessment/evaluate")
-async def api_evaluate_assessment(payload: EvaluationRequest):
+def api_evaluate_assessment(payload: EvaluationRequest):
     """
     Use Agent4 to evaluate applicant answers and return a score out of 10.
     """
     try:
-        # Convert dicts to JSON strings because Agent4 expects strings
-        questions_str = json.dumps(payload.questions_with_answers)
-        responses_str = json.dumps(payload.user_responses)
-
-        result_json_str = evaluate_responses(
-            questions_with_answers=questions_str,
-            user_responses=responses_str,
+        result = evaluate_responses(
+            questions_with_answers=payload.questions_with_answers,
+            user_responses=payload.user_responses,
         )
-
-        result = json.loads(result_json_str)
-        return JSONResponse(content=result)
+        return ORJSONResponse(content=result)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -719,16 +1245,28 @@ async def api_evaluate_assessment(payload: EvaluationRequest):
 
 if __name__ == "__main__":
     freeze_support()
-    manager = Manager()
-    agent_outputs = manager.dict()
 
-    orchestrator_process = Process(
-        target=run_all_agents_forever, args=(agent_outputs,), daemon=True
-    )
-    orchestrator_process.start()
-    print("[INFO] ✅ Orchestration process started.")
+    # The orchestrator can also run on its own (`python Orchestration.py`), e.g. one
+    # instance per deployment; set RUN_ORCHESTRATOR=0 on API-only nodes.
+    if os.getenv("RUN_ORCHESTRATOR", "1") == "1":
+        orchestrator_process = Process(target=run_all_agents_forever, daemon=True)
+        orchestrator_process.start()
+        print("[INFO] ✅ Orchestration process started.")
+
+    # Workers for queued assessment tasks (or run `python task_worker.py` separately)
+    if os.getenv("RUN_TASK_WORKERS", "1") == "1":
+        start_workers()
+        print("[INFO] ✅ Task workers started.")
+
     print("[INFO] 🌐 Swagger UI: http://127.0.0.1:8000/docs")
 
-    uvicorn.Server(
-        uvicorn.Config(app, host="0.0.0.0", port=8000, log_level="info", reload=False)
-    ).run()
+    # API workers are stateless (agent outputs come from output_store),
+    # so they can scale across cores with API_WORKERS=N
+    uvicorn.run(
+        "Apiserver:app",
+        host="0.0.0.0",
+        port=int(os.getenv("PORT", "8000")),
+        workers=int(os.getenv("API_WORKERS", "1")),
+        log_level="info",
+        reload=False,
+    )
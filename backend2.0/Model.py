@@ -1,14 +1,139 @@
 import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout, wait, FIRST_COMPLETED
 from dotenv import load_dotenv
-from google import genai
+
+import llm_gateway
+from request_timing import span
 
 load_dotenv()
 
-client = genai.Client(api_key=os.environ["GEMINI_API_KEY"])
+_client = None
+_client_lock = threading.Lock()
+
+# Model tiers (override per deployment via env)
+FAST_MODEL = os.getenv("LLM_FAST_MODEL", "gemini-2.0-flash-lite")
+STANDARD_MODEL = os.getenv("LLM_STANDARD_MODEL", "gemini-2.0-flash")
+LARGE_MODEL = os.getenv("LLM_LARGE_MODEL", "gemini-2.5-flash")
+
+# task → (model, hedge). Hedging is only worth its extra quota on candidate-facing calls.
+ROUTES = {
+    "default": (STANDARD_MODEL, False),
+    "hr_analysis": (STANDARD_MODEL, False),           # Agent1, Agent2, Agent5
+    "notification_routing": (FAST_MODEL, False),      # Agent3
+    "assessment_generation": (LARGE_MODEL, True),     # Agent4.generate_assessment
+    "assessment_evaluation": (FAST_MODEL, True),      # Agent4.evaluate_responses
+    "chat": (LARGE_MODEL, True),                      # /chat
+}
+
+# Hedged requests: once a call runs past this model's p95, fire a duplicate; first reply wins
+HEDGE_DEFAULT_AFTER_SEC = float(os.getenv("LLM_HEDGE_DEFAULT_AFTER_SEC", "8"))
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("LLM_MAX_CONCURRENCY", "16")),
+    thread_name_prefix="llm",
+)
+_latencies: dict[str, deque] = {}
+_latency_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Create the Gemini client on first use (the SDK import is slow, and a
+    missing key should fail the call / readiness check, not the import).
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                api_key = os.getenv("GEMINI_API_KEY")
+                if not api_key:
+                    raise RuntimeError("GEMINI_API_KEY is not set in .env")
+                from google import genai
+                _client = genai.Client(api_key=api_key)
+    return _client
+
+
+def ask_hf_model(prompt: str, task: str = "default", model: str | None = None) -> str:
+    """
+    Single entry point for every LLM call in the backend.
+    `task` picks the model tier from ROUTES; an explicit `model` skips routing and hedging.
+    """
+    if model:
+        hedge = False
+    else:
+        model, hedge = ROUTES.get(task, ROUTES["default"])
+
+    def generate() -> str:
+        if hedge:
+            return _generate_hedged(model, prompt)
+        return _generate(model, prompt)
+
+    # rate-limited + identical in-flight prompts share one call
+    with span("llm"):
+        return llm_gateway.call("genai", model, prompt, generate)
+
 
-def ask_hf_model(prompt: str, model: str = "gemini-2.0-flash") -> str:
-    response = client.models.generate_content(
+def _generate(model: str, prompt: str) -> str:
+    started = time.perf_counter()
+    response = get_client().models.generate_content(
         model=model,
         contents=prompt
     )
+    _record_latency(model, time.perf_counter() - started)
     return response.text  # returns the LLM output same as OpenAI-style
+
+
+def _generate_hedged(model: str, prompt: str) -> str:
+    primary = _executor.submit(_generate, model, prompt)
+    try:
+        return primary.result(timeout=hedge_after(model))
+    except FuturesTimeout:
+        pass
+
+    # the hedge needs its own rate-limit token; if none is free, just keep waiting
+    if not llm_gateway.try_acquire():
+        return primary.result()
+
+    backup = _executor.submit(_generate, model, prompt)
+    pending = {primary, backup}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+
+    # both failed → surface the primary's error
+    return primary.result()
+
+
+def hedge_after(model: str) -> float:
+    """Observed p95 latency for `model`, or a default until we have enough samples."""
+    with _latency_lock:
+        samples = sorted(_latencies.get(model, ()))
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        return HEDGE_DEFAULT_AFTER_SEC
+    return samples[int(len(samples) * 0.95) - 1]
+
+
+def latency_stats() -> dict:
+    with _latency_lock:
+        snapshot = {model: sorted(samples) for model, samples in _latencies.items()}
+    return {
+        model: {
+            "samples": len(s),
+            "p50_sec": round(s[len(s) // 2], 3),
+            "p95_sec": round(s[max(int(len(s) * 0.95) - 1, 0)], 3),
+        }
+        for model, s in snapshot.items()
+        if s
+    }
+
+
+def _record_latency(model: str, seconds: float) -> None:
+    with _latency_lock:
+        _latencies.setdefault(model, deque(maxlen=LATENCY_WINDOW)).append(seconds)
@@ -1,9 +1,16 @@
 # orchestration.py
 import time
 import json
+import signal
+import sys
+import threading
 from Agent1 import run_agent1
 from Agent2 import run_agent2
 from Agent3 import run_agent3
+import llm_gateway
+import profiler
+from output_store import get_store
+from leader_election import get_lease, LEASE_RENEW_SEC
 
 # Dictionary mapping agent names to their run functions
 AGENTS = {
@@ -16,18 +23,78 @@ AGENTS = {
 INTERVAL = 10 * 60
 
 
-def run_all_agents_forever(shared_dict):
-    while True:
-        print("\n[INFO] Running all agents...")
-        for agent_name, agent_func in AGENTS.items():
-            try:
-                output = agent_func()
-                shared_dict[agent_name + "_Output"] = output
-                print(f"[INFO] {agent_name} ran successfully.")
-            except Exception as e:
-                shared_dict[agent_name + "_Output"] = {"error": str(e)}
-                print(f"[ERROR] {agent_name} failed: {e}")
+def run_all_agents_forever():
+    """
+    Run every agent each INTERVAL and publish outputs to the shared store
+    (output_store), where any API worker can read them.
 
-        print(f"[INFO] Sleeping for {INTERVAL / 60} minutes...\n")
-        time.sleep(INTERVAL)
+    Safe to start on every replica: only the holder of the leader lease runs
+    the schedule; the others stand by and take over if its heartbeat stops.
+    """
+    # background work: lower priority + its own share of the Gemini quota
+    llm_gateway.configure(llm_gateway.BACKGROUND)
+    store = get_store()
+    lease = get_lease()
+    if threading.current_thread() is threading.main_thread():
+        # SIGTERM (e.g. the API parent stopping its daemon child) → SystemExit → finally below
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    lease.start()
+    print(f"[INFO] Orchestrator instance {lease.instance_id} started.")
 
+    try:
+        while True:
+            if not lease.is_leader:
+                time.sleep(LEASE_RENEW_SEC)
+                continue
+
+            # schedule lives on the lease so a new leader continues it instead of restarting it
+            meta = lease.read().get("meta", {})
+            interrupted = meta.get("status") == "running" and meta.get("leader") != lease.instance_id
+            next_run = meta.get("last_cycle_started_at", 0) + INTERVAL
+            if not interrupted and time.time() < next_run:
+                time.sleep(min(next_run - time.time(), LEASE_RENEW_SEC))
+                continue
+
+            cycle = meta.get("cycle", 0) + 1
+            started = time.time()
+            lease.update_meta(
+                cycle=cycle,
+                leader=lease.instance_id,
+                status="running",
+                last_cycle_started_at=started,
+            )
+
+            print(f"\n[INFO] Running all agents (cycle {cycle})...")
+            results = {}
+            # no-op unless PROFILE_NEXT_CYCLE / the profile_next_cycle flag asks for it (see profiler.py)
+            with profiler.cycle_profile(cycle):
+                for agent_name, agent_func in AGENTS.items():
+                    if not lease.is_leader:
+                        print("[WARN] Leadership lost mid-cycle; leaving the rest to the new leader.")
+                        break
+                    try:
+                        output = agent_func()
+                        store.publish(agent_name + "_Output", output)
+                        results[agent_name] = "ok"
+                        print(f"[INFO] {agent_name} ran successfully.")
+                    except Exception as e:
+                        store.publish(agent_name + "_Output", {"error": str(e)})
+                        results[agent_name] = "error"
+                        print(f"[ERROR] {agent_name} failed: {e}")
+
+            duration = time.time() - started
+            lease.update_meta(
+                status="idle",
+                last_cycle_duration_sec=round(duration, 2),
+                last_cycle_agents=results,
+            )
+            print(f"[INFO] Cycle {cycle} took {duration:.1f}s. Next run in {INTERVAL / 60} minutes...\n")
+    finally:
+        # clean shutdown releases the lease instead of leaving standbys to wait out the TTL
+        lease.stop()
+
+
+
+if __name__ == "__main__":
+    # Standalone orchestrator service: python Orchestration.py
+    run_all_agents_forever()
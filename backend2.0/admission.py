@@ -0,0 +1,322 @@
+# admission.py
+"""
+Admission control for the LLM-backed endpoints.
+
+Each route group has
+  - a per-client quota (token bucket; client = peer IP, or the X-Client-Id
+    header when ADMISSION_TRUST_CLIENT_ID=1, i.e. behind a proxy that sets it),
+    and either
+  - a concurrency limit (requests actually running) with a bounded FIFO wait
+    queue and a max wait, for routes that call Gemini inline, or
+  - a task-backlog limit, for routes that only enqueue work on task_queue and
+    return 202: their Gemini backlog is the queue, so they are refused while
+    more than `max_task_backlog` tasks are queued or running (shared by all
+    processes).
+
+Anything beyond that is rejected immediately with 429 + Retry-After instead of
+piling up behind Gemini, so admitted requests keep a stable latency.
+Concurrency limits and quotas are per API worker process.
+"""
+import asyncio
+import json
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Tuple
+
+
+def _env(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+# group → limits (override with ADMISSION_<GROUP>_<SETTING>)
+GROUPS: Dict[str, Dict[str, float]] = {
+    "chat": {
+        "concurrency": _env("ADMISSION_CHAT_CONCURRENCY", 8),
+        "queue": _env("ADMISSION_CHAT_QUEUE", 16),
+        "max_wait_sec": _env("ADMISSION_CHAT_MAX_WAIT_SEC", 10),
+        "client_per_min": _env("ADMISSION_CHAT_CLIENT_PER_MIN", 20),
+    },
+    "agent": {
+        "concurrency": _env("ADMISSION_AGENT_CONCURRENCY", 4),
+        "queue": _env("ADMISSION_AGENT_QUEUE", 8),
+        "max_wait_sec": _env("ADMISSION_AGENT_MAX_WAIT_SEC", 15),
+        "client_per_min": _env("ADMISSION_AGENT_CLIENT_PER_MIN", 10),
+    },
+    # start / submit only enqueue a task (see task_worker.py)
+    "assessment": {
+        "max_task_backlog": _env("ADMISSION_ASSESSMENT_MAX_TASK_BACKLOG", 200),
+        "task_sec": _env("ADMISSION_ASSESSMENT_TASK_SEC", 20),
+        "client_per_min": _env("ADMISSION_ASSESSMENT_CLIENT_PER_MIN", 10),
+    },
+}
+
+# (method, path regex, group)
+ROUTES: List[Tuple[str, re.Pattern, str]] = [
+    ("POST", re.compile(r"^/chat$"), "chat"),
+    ("POST", re.compile(r"^/agent/assessment/(generate|evaluate)$"), "agent"),
+    ("POST", re.compile(r"^/applications/[^/]+/assessment/(start|submit)$"), "assessment"),
+]
+
+MAX_TRACKED_CLIENTS = 10000
+# only enable behind a proxy that sets / overwrites X-Client-Id: otherwise any
+# caller can send a fresh id per request and never hit its quota
+TRUST_CLIENT_ID_HEADER = os.getenv("ADMISSION_TRUST_CLIENT_ID", "0") == "1"
+# how long a task-backlog count is reused before task_queue is asked again
+TASK_BACKLOG_REFRESH_SEC = 1.0
+TASK_WORKERS = int(os.getenv("TASK_WORKERS", "2"))
+
+
+class Rejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+
+class ConcurrencyLimiter:
+    """At most `concurrency` holders; up to `queue` waiters (FIFO), each for at most `max_wait_sec`."""
+
+    def __init__(self, concurrency: float, queue: float, max_wait_sec: float):
+        self.concurrency = int(concurrency)
+        self.queue = int(queue)
+        self.max_wait_sec = max_wait_sec
+        self.active = 0
+        self._waiters: deque = deque()
+        self._avg_service_sec = 1.0   # EWMA, for Retry-After estimates
+        self.admitted = 0
+        self.rejected = 0
+
+    def retry_after(self) -> float:
+        backlog = len(self._waiters) + 1
+        return self._avg_service_sec * backlog / max(self.concurrency, 1)
+
+    async def acquire(self) -> None:
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+
+        if len(self._waiters) >= self.queue:
+            self.rejected += 1
+            raise Rejected("queue_full", self.retry_after())
+
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), self.max_wait_sec)
+        except asyncio.TimeoutError:
+            if fut.done() and not fut.cancelled():
+                # slot was handed over just as we timed out → keep it
+                self.admitted += 1
+                return
+            fut.cancel()
+            self.rejected += 1
+            raise Rejected("queue_timeout", self.retry_after())
+        except asyncio.CancelledError:
+            # client went away: give back a slot we were already handed, else just leave the queue
+            if fut.done() and not fut.cancelled():
+                self._hand_off()
+            else:
+                fut.cancel()
+            raise
+        finally:
+            if fut in self._waiters:
+                self._waiters.remove(fut)
+        self.admitted += 1
+
+    def release(self, service_sec: float) -> None:
+        self._avg_service_sec = 0.8 * self._avg_service_sec + 0.2 * service_sec
+        self._hand_off()
+
+    def _hand_off(self) -> None:
+        # pass the slot straight to the next live waiter (active count unchanged)
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "waiting": len(self._waiters),
+            "concurrency": self.concurrency,
+            "queue": self.queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_service_ms": round(self._avg_service_sec * 1000, 1),
+        }
+
+
+class TaskBacklogLimiter:
+    """Admit while the shared task queue holds at most `max_backlog` queued / running tasks."""
+
+    def __init__(self, max_backlog: float, task_sec: float):
+        self.max_backlog = int(max_backlog)
+        self.task_sec = task_sec
+        self._backlog = 0
+        self._admitted_since_refresh = 0
+        self._refreshed_at = float("-inf")
+        self._refresh_lock: asyncio.Lock | None = None
+        self.admitted = 0
+        self.rejected = 0
+
+    def retry_after(self, backlog: int) -> float:
+        # time for TASK_WORKERS workers to work the queue back under the limit
+        return (backlog - self.max_backlog + 1) * self.task_sec / max(TASK_WORKERS, 1)
+
+    async def _current_backlog(self) -> int:
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            if time.monotonic() - self._refreshed_at >= TASK_BACKLOG_REFRESH_SEC:
+                from task_queue import get_queue
+                # blocking store query → off the event loop
+                self._backlog = await asyncio.to_thread(lambda: get_queue().backlog())
+                self._admitted_since_refresh = 0
+                self._refreshed_at = time.monotonic()
+        # count what we let in since the last read, so a burst can't overshoot
+        return self._backlog + self._admitted_since_refresh
+
+    async def acquire(self) -> None:
+        backlog = await self._current_backlog()
+        if backlog >= self.max_backlog:
+            self.rejected += 1
+            raise Rejected("task_backlog", self.retry_after(backlog))
+        self._admitted_since_refresh += 1
+        self.admitted += 1
+
+    def release(self, service_sec: float) -> None:
+        pass   # the request only enqueued; the backlog shrinks as workers finish
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "task_backlog": self._backlog + self._admitted_since_refresh,
+            "max_task_backlog": self.max_backlog,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+class ClientQuota:
+    """Per-client token buckets (refill `per_min` per minute, burst = per_min), LRU-bounded."""
+
+    def __init__(self, per_min: float):
+        self.rate = per_min / 60.0
+        self.capacity = max(per_min, 1.0)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.rejected = 0
+
+    def take(self, client: str) -> None:
+        now = time.monotonic()
+        tokens, last = self._buckets.pop(client, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - last) * self.rate)
+        if tokens < 1:
+            self._buckets[client] = (tokens, now)
+            self.rejected += 1
+            raise Rejected("client_quota", (1 - tokens) / self.rate if self.rate else 60)
+
+        self._buckets[client] = (tokens - 1, now)
+        if len(self._buckets) > MAX_TRACKED_CLIENTS:
+            self._buckets.popitem(last=False)
+
+    def refund(self, client: str) -> None:
+        """Give back the token of a request that was not admitted after all."""
+        if client in self._buckets:
+            tokens, last = self._buckets[client]
+            self._buckets[client] = (min(self.capacity, tokens + 1), last)
+
+
+_limiters = {
+    name: (
+        TaskBacklogLimiter(g["max_task_backlog"], g["task_sec"]) if "max_task_backlog" in g
+        else ConcurrencyLimiter(g["concurrency"], g["queue"], g["max_wait_sec"])
+    )
+    for name, g in GROUPS.items()
+}
+_quotas = {name: ClientQuota(g["client_per_min"]) for name, g in GROUPS.items()}
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        name: {**_limiters[name].stats(), "quota_rejected": _quotas[name].rejected}
+        for name in GROUPS
+    }
+
+
+def _route_group(method: str, path: str) -> str | None:
+    for route_method, pattern, group in ROUTES:
+        if method == route_method and pattern.match(path):
+            return group
+    return None
+
+
+def _client_id(scope) -> str:
+    if TRUST_CLIENT_ID_HEADER:
+        for name, value in scope.get("headers", []):
+            if name == b"x-client-id":
+                return "id:" + value.decode("latin-1")[:128]
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+async def _reject(send, group: str, err: Rejected) -> None:
+    body = json.dumps({
+        "detail": "Too many requests, please retry later.",
+        "reason": err.reason,
+        "group": group,
+        "retry_after_sec": err.retry_after,
+    }).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"retry-after", str(err.retry_after).encode()),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware; unmatched routes pass straight through."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        group = _route_group(scope["method"], scope["path"])
+        if group is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter, quota, client = _limiters[group], _quotas[group], _client_id(scope)
+        try:
+            # quota first, so over-quota clients never occupy queue slots ...
+            quota.take(client)
+        except Rejected as err:
+            await _reject(send, group, err)
+            return
+        try:
+            await limiter.acquire()
+        except Rejected as err:
+            # ... but a request we turned away for load doesn't count against it
+            quota.refund(client)
+            await _reject(send, group, err)
+            return
+        except asyncio.CancelledError:
+            quota.refund(client)
+            raise
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - started)
@@ -0,0 +1,93 @@
+# bench_startup.py
+"""
+Cold-start benchmark for the API.
+
+    python bench_startup.py            # import time + time-to-/healthz, 5 runs each
+    python bench_startup.py --runs 10 --top 15
+
+Every run uses a fresh interpreter so nothing is cached in-process.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def time_import(runs: int) -> list[float]:
+    """Wall-clock seconds for `import Apiserver` in a fresh interpreter."""
+    code = "import time; t = time.perf_counter(); import Apiserver; print(time.perf_counter() - t)"
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=HERE, capture_output=True, text=True, check=True,
+        )
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def time_to_healthz(runs: int, port: int) -> list[float]:
+    """Seconds from process spawn until GET /healthz returns 200."""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "Apiserver:app", "--port", str(port), "--log-level", "warning"],
+            cwd=HERE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            while True:
+                if proc.poll() is not None:
+                    raise RuntimeError("uvicorn exited before becoming healthy")
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{port}/healthz", timeout=0.5) as r:
+                        if r.status == 200:
+                            break
+                except OSError:
+                    time.sleep(0.02)
+            samples.append(time.perf_counter() - started)
+        finally:
+            proc.terminate()
+            proc.wait()
+    return samples
+
+
+def slowest_imports(top: int) -> list[tuple[int, str]]:
+    """Top modules by cumulative import time (microseconds), from -X importtime."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import Apiserver"],
+        cwd=HERE, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, name = (p.strip() for p in line[len("import time:"):].split("|"))
+        rows.append((int(cumulative_us), name))
+    return sorted(rows, reverse=True)[:top]
+
+
+def _summary(samples: list[float]) -> str:
+    return f"median {statistics.median(samples) * 1000:.0f} ms  (min {min(samples) * 1000:.0f}, max {max(samples) * 1000:.0f})"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--skip-server", action="store_true", help="only measure import time")
+    args = parser.parse_args()
+
+    print(f"[BENCH] import Apiserver      {_summary(time_import(args.runs))}")
+    if not args.skip_server:
+        print(f"[BENCH] spawn → /healthz 200  {_summary(time_to_healthz(args.runs, args.port))}")
+
+    print("\n[BENCH] Slowest imports (cumulative):")
+    for cumulative_us, name in slowest_imports(args.top):
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
@@ -1,38 +1,47 @@
-import os
-import google.generativeai as genai
-from dotenv import load_dotenv
+from Model import ask_hf_model
 
-load_dotenv()
+# bounds on the retrieved context, so prompt size doesn't grow with the data
+CHAT_CONTEXT_SNIPPETS = 8
+CHAT_CONTEXT_CHARS = 4000
 
-# Load Gemini API key
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise ValueError("❌ GEMINI_API_KEY not found in environment variables.")
 
-# Configure Gemini
-genai.configure(api_key=GEMINI_API_KEY)
-
-def ask_gemini(prompt: str, model: str = "gemini-2.5-flash") -> str:
+def ask_gemini(prompt: str) -> str:
     """
     Sends a prompt to Google Gemini and returns model response as a string.
+    Uses the shared LLM backend in Model.py ("chat" route).
     """
     try:
-        # Create model object
-        model_obj = genai.GenerativeModel(model)
+        return ask_hf_model(prompt, task="chat")
+
+    except Exception as e:
+        print("Gemini error:", e)
+        return "⚠️ Error: Could not get response from Gemini."
 
-        # Send prompt
-        response = model_obj.generate_content(prompt)
 
-        # Return text safely
-        if hasattr(response, "text"):
-            return response.text
+def build_grounded_prompt(message: str, snippets: list) -> str:
+    context = "\n".join(f"- {s['text']}" for s in snippets) or "- (no matching HR records)"
+    return (
+        "You are the OrbitOne HR assistant. Answer the user's question using the HR "
+        "context below (company HR records and the latest agent reports). If the "
+        "context does not contain the answer, say so briefly instead of guessing.\n\n"
+        f"HR context:\n{context}\n\n"
+        f"User: {message}"
+    )
 
-        # Fallback for edge formats
-        return str(response)
 
+def ask_hr_assistant(message: str) -> tuple[str, list]:
+    """
+    Retrieval-grounded chat: fetch the most relevant HR snippets for `message`
+    and answer from them. Returns (reply, snippets used).
+    """
+    from hr_knowledge import retrieve
+
+    try:
+        snippets = retrieve(message, top_k=CHAT_CONTEXT_SNIPPETS, max_chars=CHAT_CONTEXT_CHARS)
     except Exception as e:
-        print("Gemini error:", e)
-        return "⚠️ Error: Could not get response from Gemini."
+        print("Retrieval error:", e)
+        snippets = []
+    return ask_gemini(build_grounded_prompt(message, snippets)), snippets
 
 
 if __name__ == "__main__":
@@ -1,9 +1,13 @@
 import os
-import fitz  # PyMuPDF for PDFs
-from docx import Document
+import tempfile
+
+# PyMuPDF (fitz) and python-docx are imported inside the extractors:
+# they are slow to import and only needed when a resume is actually parsed.
 
 def extract_text_from_pdf(file_path: str) -> str:
     """Extracts all text from a PDF file."""
+    import fitz  # PyMuPDF for PDFs
+
     text = ""
     with fitz.open(file_path) as pdf:
         for page in pdf:
@@ -12,6 +16,8 @@ def extract_text_from_pdf(file_path: str) -> str:
 
 def extract_text_from_docx(file_path: str) -> str:
     """Extracts all text from a DOCX file."""
+    from docx import Document
+
     doc = Document(file_path)
     text = "\n".join([para.text for para in doc.paragraphs])
     return text.strip()
@@ -40,6 +46,22 @@ def extract_text(file_path: str) -> str:
     else:
         raise ValueError(f"Unsupported file type: {ext}")
 
+def extract_text_from_bytes(filename: str, data: bytes) -> str:
+    """
+    Extract text from in-memory file contents (e.g. a zip entry).
+    Top-level so it can run in a ProcessPoolExecutor worker.
+    """
+    suffix = os.path.splitext(filename)[1].lower()
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        tmp.write(data)
+        tmp_path = tmp.name
+
+    try:
+        return extract_text(tmp_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
 if __name__ == "__main__":
     # Example usage (for testing)
     cv_path = input("Enter path to CV file (.pdf/.docx/.txt): ").strip()
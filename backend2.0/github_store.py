@@ -0,0 +1,361 @@
+# github_store.py
+"""
+GitHub Contents API access for jobs.json / chain.json.
+Shared by the API (async) and background workers (task_worker.py, sync).
+
+All traffic goes through two long-lived pooled clients (one async, one sync)
+so connections are kept alive instead of paying a TCP+TLS handshake per call.
+Every request has explicit timeouts, is retried with jittered backoff on 5xx
+and rate-limit responses, and respects GitHub's X-RateLimit-* headers.
+stats() reports per-operation latency, retries and handshake counts.
+"""
+import asyncio
+import base64
+import email.utils
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+import httpx
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+from request_timing import span
+
+load_dotenv()
+
+GITHUB_REPO = os.getenv("GITHUB_REPO")
+GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+FILE_PATH = os.getenv("FILE_PATH")
+CHAIN_FILE_PATH = os.getenv("CHAIN_FILE_PATH")
+
+API_URL = "https://api.github.com"
+GITHUB_TIMEOUT = httpx.Timeout(float(os.getenv("GITHUB_TIMEOUT_SEC", "15")), connect=5.0)
+GITHUB_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60)
+GITHUB_MAX_RETRIES = int(os.getenv("GITHUB_MAX_RETRIES", "3"))
+RETRY_BASE_SEC = 0.5
+# never sleep longer than this for a rate-limit reset; fail fast instead
+RATE_LIMIT_MAX_WAIT_SEC = float(os.getenv("GITHUB_RATE_LIMIT_MAX_WAIT_SEC", "10"))
+
+
+# =========================
+# 🔹 Metrics
+# =========================
+
+class _Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tcp_connects = 0
+        self.tls_handshakes = 0
+        self.retries = 0
+        self.rate_limit_waits = 0
+        self.rate_remaining: int | None = None
+        self.rate_reset: float | None = None
+        self._ops: Dict[str, Dict[str, float]] = {}
+
+    def on_trace(self, event: str) -> None:
+        if event == "connection.connect_tcp.complete":
+            with self._lock:
+                self.tcp_connects += 1
+        elif event == "connection.start_tls.complete":
+            with self._lock:
+                self.tls_handshakes += 1
+
+    def bump(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def record(self, op: str, elapsed: float, ok: bool) -> None:
+        with self._lock:
+            s = self._ops.setdefault(op, {"calls": 0, "errors": 0, "total_sec": 0.0, "max_sec": 0.0})
+            s["calls"] += 1
+            s["errors"] += 0 if ok else 1
+            s["total_sec"] += elapsed
+            s["max_sec"] = max(s["max_sec"], elapsed)
+
+    def note_rate_limit(self, response: httpx.Response) -> None:
+        remaining = response.headers.get("x-ratelimit-remaining")
+        reset = response.headers.get("x-ratelimit-reset")
+        if remaining is not None and reset is not None:
+            with self._lock:
+                self.rate_remaining = int(remaining)
+                self.rate_reset = float(reset)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "tcp_connects": self.tcp_connects,
+                "tls_handshakes": self.tls_handshakes,
+                "retries": self.retries,
+                "rate_limit_waits": self.rate_limit_waits,
+                "rate_limit_remaining": self.rate_remaining,
+                "rate_limit_reset": self.rate_reset,
+                "operations": {
+                    op: {
+                        "calls": int(s["calls"]),
+                        "errors": int(s["errors"]),
+                        "avg_ms": round(1000 * s["total_sec"] / s["calls"], 1),
+                        "max_ms": round(1000 * s["max_sec"], 1),
+                    }
+                    for op, s in self._ops.items()
+                },
+            }
+
+
+_stats = _Stats()
+
+
+def stats() -> Dict[str, Any]:
+    return _stats.snapshot()
+
+
+# =========================
+# 🔹 Retry policy
+# =========================
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, RETRY_BASE_SEC * 2 ** attempt)
+
+
+def _retry_after_seconds(value: str) -> float:
+    """Retry-After is either delta-seconds or an HTTP-date."""
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return RETRY_BASE_SEC
+
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float | None:
+    """Seconds to wait before retrying `response`, or None if it shouldn't be retried."""
+    status = response.status_code
+    if status >= 500:
+        return _backoff(attempt)
+
+    if status in (403, 429):
+        retry_after = response.headers.get("retry-after")
+        if retry_after is not None:
+            return _retry_after_seconds(retry_after) + random.uniform(0, RETRY_BASE_SEC)
+        if response.headers.get("x-ratelimit-remaining") == "0":
+            reset = float(response.headers.get("x-ratelimit-reset", time.time()))
+            return max(reset - time.time(), 0) + random.uniform(0, RETRY_BASE_SEC)
+        if "secondary rate limit" in response.text.lower():
+            return max(_backoff(attempt), 1.0)
+
+    # 4xx (bad sha, missing file, permissions) won't fix themselves
+    return None
+
+
+def _wait_for_quota() -> float:
+    """If the last response said the quota is spent, how long until it resets."""
+    if _stats.rate_remaining == 0 and _stats.rate_reset:
+        wait = _stats.rate_reset - time.time()
+        if 0 < wait <= RATE_LIMIT_MAX_WAIT_SEC:
+            return wait
+    return 0.0
+
+
+# =========================
+# 🔹 Clients
+# =========================
+
+def _headers() -> Dict[str, str]:
+    return {
+        "Authorization": f"token {GITHUB_TOKEN}",
+        "Accept": "application/vnd.github+json",
+    }
+
+
+_async_client: httpx.AsyncClient | None = None
+_sync_client: httpx.Client | None = None
+_sync_client_lock = threading.Lock()
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    # created inside the running event loop on first use (one per API worker)
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(
+            base_url=API_URL, headers=_headers(), timeout=GITHUB_TIMEOUT, limits=GITHUB_LIMITS
+        )
+    return _async_client
+
+
+def _get_sync_client() -> httpx.Client:
+    global _sync_client
+    if _sync_client is None:
+        with _sync_client_lock:
+            if _sync_client is None:
+                _sync_client = httpx.Client(
+                    base_url=API_URL, headers=_headers(), timeout=GITHUB_TIMEOUT, limits=GITHUB_LIMITS
+                )
+    return _sync_client
+
+
+async def aclose() -> None:
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+async def _async_trace(event: str, info: dict) -> None:
+    _stats.on_trace(event)
+
+
+def _sync_trace(event: str, info: dict) -> None:
+    _stats.on_trace(event)
+
+
+async def request(op: str, method: str, url: str, **kwargs) -> httpx.Response:
+    """Async request with retries; returns the final response (any status)."""
+    with span("github"):
+        return await _request(op, method, url, **kwargs)
+
+
+async def _request(op: str, method: str, url: str, **kwargs) -> httpx.Response:
+    client = _get_async_client()
+    start = time.perf_counter()
+    response = None
+    try:
+        for attempt in range(GITHUB_MAX_RETRIES + 1):
+            wait = _wait_for_quota()
+            if wait:
+                _stats.bump("rate_limit_waits")
+                await asyncio.sleep(wait)
+
+            try:
+                response = await client.request(method, url, extensions={"trace": _async_trace}, **kwargs)
+            except httpx.TransportError:
+                if attempt == GITHUB_MAX_RETRIES:
+                    raise
+                _stats.bump("retries")
+                await asyncio.sleep(_backoff(attempt))
+                continue
+
+            _stats.note_rate_limit(response)
+            delay = _retry_delay(response, attempt)
+            if delay is None or attempt == GITHUB_MAX_RETRIES or delay > RATE_LIMIT_MAX_WAIT_SEC:
+                return response
+            _stats.bump("retries")
+            await asyncio.sleep(delay)
+        return response
+    finally:
+        _stats.record(op, time.perf_counter() - start, response is not None and response.is_success)
+
+
+def request_sync(op: str, method: str, url: str, **kwargs) -> httpx.Response:
+    """Blocking twin of request() for worker processes and threadpool endpoints."""
+    with span("github"):
+        return _request_sync(op, method, url, **kwargs)
+
+
+def _request_sync(op: str, method: str, url: str, **kwargs) -> httpx.Response:
+    client = _get_sync_client()
+    start = time.perf_counter()
+    response = None
+    try:
+        for attempt in range(GITHUB_MAX_RETRIES + 1):
+            wait = _wait_for_quota()
+            if wait:
+                _stats.bump("rate_limit_waits")
+                time.sleep(wait)
+
+            try:
+                response = client.request(method, url, extensions={"trace": _sync_trace}, **kwargs)
+            except httpx.TransportError:
+                if attempt == GITHUB_MAX_RETRIES:
+                    raise
+                _stats.bump("retries")
+                time.sleep(_backoff(attempt))
+                continue
+
+            _stats.note_rate_limit(response)
+            delay = _retry_delay(response, attempt)
+            if delay is None or attempt == GITHUB_MAX_RETRIES or delay > RATE_LIMIT_MAX_WAIT_SEC:
+                return response
+            _stats.bump("retries")
+            time.sleep(delay)
+        return response
+    finally:
+        _stats.record(op, time.perf_counter() - start, response is not None and response.is_success)
+
+
+# =========================
+# 🔹 Contents API helpers
+# =========================
+
+def _contents_url(path: str) -> str:
+    return f"/repos/{GITHUB_REPO}/contents/{path}"
+
+
+def _decode_file(response: httpx.Response) -> Tuple[str, str]:
+    data = response.json()
+    return base64.b64decode(data["content"]).decode("utf-8"), data["sha"]
+
+
+def _put_body(content: str, sha: str, message: str) -> Dict[str, str]:
+    return {
+        "message": message,
+        "content": base64.b64encode(content.encode()).decode(),
+        "sha": sha,
+        "branch": "main",
+    }
+
+
+async def read_file(path: str) -> Tuple[str, str] | None:
+    """(decoded text, sha) of a repository file, or None if GitHub didn't return it."""
+    response = await request(f"GET {path}", "GET", _contents_url(path))
+    if response.status_code != 200:
+        return None
+    return _decode_file(response)
+
+
+def read_file_sync(path: str) -> Tuple[str, str] | None:
+    response = request_sync(f"GET {path}", "GET", _contents_url(path))
+    if response.status_code != 200:
+        return None
+    return _decode_file(response)
+
+
+async def write_file(path: str, content: str, sha: str, message: str) -> bool:
+    """Commit new file content on main; False if GitHub rejected it."""
+    response = await request(f"PUT {path}", "PUT", _contents_url(path), json=_put_body(content, sha, message))
+    return response.status_code in (200, 201)
+
+
+# ✅ NEW: helper to get job description from jobs.json (GitHub)
+def fetch_job_description(job_id: str) -> str:
+    """
+    Fetch jobs.json from GitHub and return the description for a given job_id.
+
+    job_id is stored as string in MongoDB (from /applications),
+    but jobs.json has numeric id. We convert.
+    """
+    try:
+        job_id_int = int(job_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid job_id stored in application")
+
+    fetched = read_file_sync(FILE_PATH)
+    if fetched is None:
+        raise HTTPException(status_code=500, detail="Failed to fetch jobs.json from GitHub.")
+
+    try:
+        jobs_data = json.loads(fetched[0])
+        job_list = jobs_data.get("jobs", [])
+    except Exception:
+        raise HTTPException(status_code=500, detail="Failed to parse jobs.json content.")
+
+    for job in job_list:
+        if job.get("id") == job_id_int:
+            return job.get("description", "")
+
+    raise HTTPException(status_code=404, detail=f"Job description not found for id {job_id}")
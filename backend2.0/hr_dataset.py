@@ -0,0 +1,346 @@
+# hr_dataset.py
+"""
+Columnar, memory-mapped copy of the HR export (hr_mock_data.json).
+
+    python hr_dataset.py [path/to/export.json]     # (re)build HR_COLUMNS_DIR
+
+Ingestion writes one directory per section, with one NumPy file per column:
+  - int / float / bool fields → a plain .npy array
+  - text (and nested values, JSON-encoded) → <col>.data.npy (UTF-8 bytes)
+    + <col>.offsets.npy (row boundaries), so rows are sliced without parsing others
+Sections that are a single object (e.g. payroll_rules) are kept as <section>.json.
+
+Readers open columns with mmap_mode="r": only the columns (and pages) an agent
+touches are read, instead of parsing the whole export first.
+
+Every ingest writes a new version directory (HR_COLUMNS_DIR/v<time>-<pid>) and
+then atomically replaces the CURRENT pointer file, so readers never see a
+half-written dataset. Ingests are serialized across processes with a lock file;
+the previous version is kept for readers that still have it open.
+"""
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List
+
+# NumPy is imported inside the functions that read / write columns, so importing
+# this module (Apiserver → Orchestration → agents) doesn't pay for it at boot
+if TYPE_CHECKING:
+    import numpy as np
+
+HR_DATA_PATH = os.path.join(os.path.dirname(__file__), "hr_mock_data.json")
+HR_COLUMNS_DIR = os.getenv(
+    "HR_COLUMNS_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "hr_columns"),
+)
+MANIFEST = "manifest.json"
+CURRENT = "CURRENT"
+LOCK_FILE = ".ingest.lock"
+KEEP_VERSIONS = 2
+
+# list items that aren't objects are stored under this column name
+VALUE_COLUMN = "value"
+
+
+class TextColumn:
+    """Read-only sequence of strings over memory-mapped bytes + offsets."""
+
+    def __init__(self, data: "np.ndarray", offsets: "np.ndarray", kind: str):
+        self._data = data
+        self._offsets = offsets
+        self._kind = kind
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> Any:
+        if i < 0:
+            i += len(self)
+        raw = self._data[self._offsets[i]:self._offsets[i + 1]].tobytes().decode("utf-8")
+        return json.loads(raw) if self._kind == "json" else raw
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+# =========================
+# 🔹 Ingestion
+# =========================
+
+def _column_kind(values: List[Any]) -> str:
+    types = {type(v) for v in values}
+    if types == {bool}:
+        return "bool"
+    if types == {int}:
+        return "int"
+    if types <= {int, float} and types:
+        return "float"
+    if types == {str}:
+        return "str"
+    # mixed / nested / missing values → keep them exact as JSON text
+    return "json"
+
+
+def _write_column(section_dir: str, name: str, values: List[Any]) -> str:
+    import numpy as np
+
+    kind = _column_kind(values)
+    base = os.path.join(section_dir, name)
+
+    if kind in ("bool", "int", "float"):
+        dtype = {"bool": np.bool_, "int": np.int64, "float": np.float64}[kind]
+        np.save(base + ".npy", np.asarray(values, dtype=dtype))
+        return kind
+
+    encoded = [
+        (v if kind == "str" else json.dumps(v, ensure_ascii=False)).encode("utf-8")
+        for v in values
+    ]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    np.save(base + ".data.npy", np.frombuffer(b"".join(encoded), dtype=np.uint8))
+    np.save(base + ".offsets.npy", offsets)
+    return kind
+
+
+def _write_section(out_dir: str, section: str, rows: List[Any]) -> Dict[str, Any]:
+    section_dir = os.path.join(out_dir, section)
+    os.makedirs(section_dir)
+
+    if all(isinstance(r, dict) for r in rows):
+        names: List[str] = []
+        for row in rows:
+            names += [k for k in row if k not in names]
+        columns = {name: [row.get(name) for row in rows] for name in names}
+    else:
+        columns = {VALUE_COLUMN: rows}
+
+    return {
+        "rows": len(rows),
+        "columns": {name: _write_column(section_dir, name, values) for name, values in columns.items()},
+    }
+
+
+@contextmanager
+def _ingest_lock(out_dir: str):
+    """Exclusive lock across processes (API workers, orchestrator, task workers)."""
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, LOCK_FILE), "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue   # LK_LOCK gives up after ~10s; keep waiting
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _read_current(out_dir: str) -> Dict[str, Any] | None:
+    """Manifest of the version CURRENT points at, with its directory under "path"."""
+    try:
+        with open(os.path.join(out_dir, CURRENT), "r") as f:
+            version = f.read().strip()
+        with open(os.path.join(out_dir, version, MANIFEST), "r") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    manifest["path"] = os.path.join(out_dir, version)
+    return manifest
+
+
+def _prune_versions(out_dir: str, keep: str) -> None:
+    versions = sorted(
+        (d for d in os.listdir(out_dir) if d.startswith("v") and os.path.isdir(os.path.join(out_dir, d))),
+        key=lambda d: os.path.getmtime(os.path.join(out_dir, d)),
+    )
+    for d in versions[:-KEEP_VERSIONS]:
+        if d != keep:
+            shutil.rmtree(os.path.join(out_dir, d), ignore_errors=True)
+
+
+def ingest(json_path: str = HR_DATA_PATH, out_dir: str = HR_COLUMNS_DIR) -> Dict[str, Any]:
+    """Convert the JSON export into a new version of the columnar layout and make it current."""
+    with _ingest_lock(out_dir):
+        return _ingest_locked(json_path, out_dir)
+
+
+def _ingest_locked(json_path: str, out_dir: str) -> Dict[str, Any]:
+    with open(json_path, "r") as f:
+        hr_data = json.load(f)
+
+    version = f"v{time.time_ns()}-{os.getpid()}"
+    version_dir = os.path.join(out_dir, version)
+    os.makedirs(version_dir)
+
+    manifest: Dict[str, Any] = {
+        "source": os.path.abspath(json_path),
+        "source_mtime": os.path.getmtime(json_path),
+        "sections": {},
+        "objects": [],
+    }
+    for section, value in hr_data.items():
+        if isinstance(value, list):
+            manifest["sections"][section] = _write_section(version_dir, section, value)
+        else:
+            with open(os.path.join(version_dir, f"{section}.json"), "w") as f:
+                json.dump(value, f)
+            manifest["objects"].append(section)
+
+    with open(os.path.join(version_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    # atomic switch: readers see either the old version or the complete new one
+    pointer_tmp = os.path.join(out_dir, f"{CURRENT}.tmp-{os.getpid()}")
+    with open(pointer_tmp, "w") as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(out_dir, CURRENT))
+
+    _prune_versions(out_dir, keep=version)
+    manifest["path"] = version_dir
+    return manifest
+
+
+# =========================
+# 🔹 Reading
+# =========================
+
+_manifest: Dict[str, Any] | None = None
+_current_mtime: float | None = None
+_manifest_lock = threading.Lock()
+
+
+def manifest() -> Dict[str, Any]:
+    """
+    Current manifest (its version directory is under "path"). Re-ingests first
+    if the JSON export is newer than the columns; if only the columns exist
+    (export ingested elsewhere), uses them. Picks up versions ingested by
+    other processes.
+    """
+    global _manifest, _current_mtime
+    with _manifest_lock:
+        source_mtime = os.path.getmtime(HR_DATA_PATH) if os.path.exists(HR_DATA_PATH) else None
+        try:
+            current_mtime = os.path.getmtime(os.path.join(HR_COLUMNS_DIR, CURRENT))
+        except FileNotFoundError:
+            current_mtime = None
+
+        def is_stale(m: Dict[str, Any] | None) -> bool:
+            if m is None:
+                return True
+            # columns built from some other export (CLI path) are left alone
+            return m["source"] == os.path.abspath(HR_DATA_PATH) and m["source_mtime"] != source_mtime
+
+        if is_stale(_manifest) or current_mtime != _current_mtime:
+            current = _read_current(HR_COLUMNS_DIR)
+            if is_stale(current) and source_mtime is not None:
+                with _ingest_lock(HR_COLUMNS_DIR):
+                    # another process may have ingested while we waited for the lock
+                    current = _read_current(HR_COLUMNS_DIR)
+                    if is_stale(current):
+                        print("[INFO] HR columns missing or stale → ingesting hr_mock_data.json")
+                        current = _ingest_locked(HR_DATA_PATH, HR_COLUMNS_DIR)
+            if current is None:
+                raise FileNotFoundError(f"No HR columns in {HR_COLUMNS_DIR} and no {HR_DATA_PATH} to ingest")
+            _manifest = current
+            try:
+                _current_mtime = os.path.getmtime(os.path.join(HR_COLUMNS_DIR, CURRENT))
+            except FileNotFoundError:
+                _current_mtime = None
+        return _manifest
+
+
+def is_ingested(json_path: str) -> bool:
+    """True if the current columns were built from this JSON file."""
+    try:
+        return manifest()["source"] == os.path.abspath(json_path)
+    except FileNotFoundError:
+        return False
+
+
+def load_columns(section: str, columns: Iterable[str] | None = None) -> Dict[str, Any]:
+    """
+    Memory-mapped columns of one section: numbers as NumPy arrays, text /
+    nested values as TextColumn. `columns=None` loads every column.
+    """
+    import numpy as np
+
+    current = manifest()
+    info = current["sections"].get(section)
+    if info is None:
+        return {}
+
+    section_dir = os.path.join(current["path"], section)
+    out = {}
+    for name in (columns or info["columns"]):
+        kind = info["columns"].get(name)
+        if kind is None:
+            continue
+        base = os.path.join(section_dir, name)
+        if kind in ("bool", "int", "float"):
+            out[name] = np.load(base + ".npy", mmap_mode="r")
+        else:
+            out[name] = TextColumn(
+                np.load(base + ".data.npy", mmap_mode="r"),
+                np.load(base + ".offsets.npy", mmap_mode="r"),
+                kind,
+            )
+    return out
+
+
+def load_values(section: str) -> List[Any]:
+    """Items of a section whose entries aren't objects (e.g. company_news)."""
+    column = load_columns(section, [VALUE_COLUMN]).get(VALUE_COLUMN)
+    return list(column) if column is not None else []
+
+
+def load_records(section: str, columns: Iterable[str] | None = None) -> List[Dict[str, Any]]:
+    """Rows of a section as dicts, built from only the requested columns."""
+    import numpy as np
+
+    cols = load_columns(section, columns)
+    n_rows = manifest()["sections"].get(section, {}).get("rows", 0)
+    records = []
+    for i in range(n_rows):
+        row = {}
+        for name, column in cols.items():
+            value = column[i]
+            if value is None:
+                continue   # field absent on this row in the export
+            row[name] = value.item() if isinstance(value, np.generic) else value
+        records.append(row)
+    return records
+
+
+def load_object(section: str) -> Any:
+    """Object-valued sections (payroll_rules) are small and stored as plain JSON."""
+    current = manifest()
+    if section not in current["objects"]:
+        return None
+    with open(os.path.join(current["path"], f"{section}.json"), "r") as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else HR_DATA_PATH
+    result = ingest(source)
+    for name, info in result["sections"].items():
+        print(f"[INFO] {name}: {info['rows']} rows, columns {info['columns']}")
+    print(f"[INFO] Objects: {result['objects']} → {result['path']}")
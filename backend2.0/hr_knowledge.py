@@ -0,0 +1,202 @@
+# hr_knowledge.py
+"""
+Local retrieval index for /chat.
+
+Snippets come from hr_mock_data.json (one per record / sub-section) and from the
+latest agent outputs in output_store (analysis paragraphs, tasks, other fields).
+Each source is re-chunked only when its content changes, so a new orchestrator
+publish re-indexes just that agent's output. Ranking is BM25.
+"""
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+from output_store import get_store
+from search_index import tokenize
+
+HR_DATA_PATH = os.path.join(os.path.dirname(__file__), "hr_mock_data.json")
+
+# how often a chat request may re-check the sources for changes
+REFRESH_INTERVAL_SEC = 30
+CHUNK_CHARS = 600
+
+
+def _chunk_text(text: str, size: int = CHUNK_CHARS) -> List[str]:
+    """Split long prose on sentence-ish boundaries into ~size-char pieces."""
+    text = " ".join(str(text).split())
+    if len(text) <= size:
+        return [text] if text else []
+
+    chunks, current = [], ""
+    for sentence in text.replace("? ", "?\n").replace(". ", ".\n").split("\n"):
+        if current and len(current) + len(sentence) + 1 > size:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def hr_data_snippets(hr_data: Dict[str, Any]) -> List[str]:
+    snippets = []
+    for section, value in hr_data.items():
+        if isinstance(value, list):
+            snippets += [f"[{section}] {json.dumps(item, ensure_ascii=False)}" for item in value]
+        elif isinstance(value, dict):
+            snippets += [f"[{section}.{key}] {json.dumps(v, ensure_ascii=False)}" for key, v in value.items()]
+        else:
+            snippets.append(f"[{section}] {value}")
+    return snippets
+
+
+def agent_output_snippets(key: str, output: Any) -> List[str]:
+    agent = key.replace("_Output", "")
+    if not isinstance(output, dict):
+        return [f"[{agent}] {chunk}" for chunk in _chunk_text(json.dumps(output, ensure_ascii=False))]
+
+    snippets = []
+    for field, value in output.items():
+        if field == "tasks" and isinstance(value, list):
+            snippets += [f"[{agent} task] {t.get('task_description', t) if isinstance(t, dict) else t}" for t in value]
+        elif isinstance(value, str):
+            snippets += [f"[{agent} {field}] {chunk}" for chunk in _chunk_text(value)]
+        else:
+            snippets += [f"[{agent} {field}] {chunk}" for chunk in _chunk_text(json.dumps(value, ensure_ascii=False))]
+    return snippets
+
+
+class SnippetIndex:
+    """Small BM25 index whose documents are grouped by source and replaceable per source."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._docs: Dict[int, Tuple[str, str, int]] = {}       # doc_id → (source, text, length)
+        self._tfs: Dict[int, Counter] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._by_source: Dict[str, List[int]] = {}
+        self._source_hash: Dict[str, str] = {}
+        self._total_len = 0
+        self._next_id = 0
+
+    def source_hash(self, source: str) -> str | None:
+        return self._source_hash.get(source)
+
+    def replace_source(self, source: str, content_hash: str, snippets: List[str]) -> None:
+        for doc_id in self._by_source.pop(source, []):
+            _, _, length = self._docs.pop(doc_id)
+            self._total_len -= length
+            for term in self._tfs.pop(doc_id):
+                postings = self._postings[term]
+                del postings[doc_id]
+                if not postings:
+                    del self._postings[term]
+
+        ids = []
+        for text in snippets:
+            tf = Counter(tokenize(text))
+            doc_id = self._next_id
+            self._next_id += 1
+            length = sum(tf.values())
+            self._docs[doc_id] = (source, text, length)
+            self._tfs[doc_id] = tf
+            self._total_len += length
+            for term, count in tf.items():
+                self._postings.setdefault(term, {})[doc_id] = count
+            ids.append(doc_id)
+
+        self._by_source[source] = ids
+        self._source_hash[source] = content_hash
+
+    def drop_missing(self, keep: set) -> None:
+        for source in [s for s in self._by_source if s not in keep]:
+            self.replace_source(source, "", [])
+            del self._by_source[source]
+            del self._source_hash[source]
+
+    def search(self, query: str, top_k: int) -> List[Tuple[str, str, float]]:
+        n_docs = len(self._docs)
+        if not n_docs:
+            return []
+        avg_len = self._total_len / n_docs or 1.0
+
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                length = self._docs[doc_id][2]
+                norm = tf + self.k1 * (1 - self.b + self.b * length / avg_len)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+
+        best = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
+        return [(self._docs[d][0], self._docs[d][1], round(s, 4)) for d, s in best]
+
+
+_index = SnippetIndex()
+_lock = threading.Lock()
+_last_refresh = 0.0
+
+
+def _content_hash(obj: Any) -> str:
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def refresh(force: bool = False) -> None:
+    """Re-index any source whose content changed since the last refresh."""
+    global _last_refresh
+    with _lock:
+        if not force and time.monotonic() - _last_refresh < REFRESH_INTERVAL_SEC:
+            return
+        _last_refresh = time.monotonic()
+
+        # HR dataset: cheap mtime check before re-reading the file
+        try:
+            mtime_key = str(os.path.getmtime(HR_DATA_PATH))
+            if _index.source_hash("hr_data") != mtime_key:
+                with open(HR_DATA_PATH, "r") as f:
+                    _index.replace_source("hr_data", mtime_key, hr_data_snippets(json.load(f)))
+        except OSError as e:
+            print(f"[WARN] HR data not indexed: {e}")
+
+        # Latest agent outputs (published by the orchestrator)
+        try:
+            outputs = get_store().get_all()
+        except Exception as e:
+            print(f"[WARN] Agent outputs not indexed: {e}")
+            return
+
+        for key, output in outputs.items():
+            digest = _content_hash(output)
+            if _index.source_hash(key) != digest:
+                _index.replace_source(key, digest, agent_output_snippets(key, output))
+        _index.drop_missing(set(outputs) | {"hr_data"})
+
+
+def retrieve(query: str, top_k: int = 8, max_chars: int = 4000) -> List[Dict[str, Any]]:
+    """
+    Most relevant snippets for `query`, capped at `max_chars` in total
+    so the chat prompt stays bounded however large the data gets.
+    """
+    refresh()
+    with _lock:
+        hits = _index.search(query, top_k)
+
+    results, used = [], 0
+    for source, text, score in hits:
+        if used + len(text) > max_chars:
+            text = text[: max(max_chars - used, 0)]
+        if not text:
+            break
+        results.append({"source": source, "text": text, "score": score})
+        used += len(text)
+    return results
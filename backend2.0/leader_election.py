@@ -0,0 +1,245 @@
+# leader_election.py
+"""
+Lease-based leader election so only one instance runs the agent schedule.
+
+Every orchestrator instance runs a heartbeat thread that tries to take or renew
+a named lease. The lease expires LEASE_TTL_SEC after the last heartbeat, so if
+the leader dies another instance takes over within a few seconds.
+
+The lease record also carries run metadata (cycle number, timings) so the
+schedule survives failover and can be shown via the API.
+
+Backend follows output_store: Mongo `orchestrator_leases` collection, or a
+local SQLite file as a single-node stand-in.
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Dict
+
+from output_store import AGENT_OUTPUT_DB, AGENT_OUTPUT_STORE
+
+LEASE_NAME = "agent_schedule"
+LEASE_TTL_SEC = float(os.getenv("LEASE_TTL_SEC", "15"))
+LEASE_RENEW_SEC = LEASE_TTL_SEC / 3
+
+
+def make_instance_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class _Lease(ABC):
+    def __init__(self, name: str = LEASE_NAME, instance_id: str | None = None):
+        self.name = name
+        self.instance_id = instance_id or make_instance_id()
+        self._is_leader = False
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._is_leader
+
+    def start(self) -> None:
+        """Start the heartbeat thread (acquire / renew every LEASE_RENEW_SEC)."""
+        self.heartbeat()
+        self._thread = threading.Thread(target=self._run, name="lease-heartbeat", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop heartbeating and hand the lease back so a standby takes over at once."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=LEASE_RENEW_SEC)
+        if self._is_leader:
+            try:
+                self._release()
+            except Exception as e:
+                print(f"[WARN] Could not release lease (expires in {LEASE_TTL_SEC:.0f}s): {e}")
+        self._is_leader = False
+
+    def heartbeat(self) -> bool:
+        was_leader = self._is_leader
+        try:
+            self._is_leader = self._acquire_or_renew(time.time())
+        except Exception as e:
+            # can't reach the store → can't prove we still hold the lease
+            print(f"[WARN] Lease heartbeat failed: {e}")
+            self._is_leader = False
+
+        if self._is_leader and not was_leader:
+            print(f"[INFO] 👑 {self.instance_id} is now the orchestrator leader.")
+        elif was_leader and not self._is_leader:
+            print(f"[WARN] {self.instance_id} lost orchestrator leadership.")
+        return self._is_leader
+
+    def _run(self) -> None:
+        while not self._stop.wait(LEASE_RENEW_SEC):
+            self.heartbeat()
+
+    # backend-specific
+    @abstractmethod
+    def _acquire_or_renew(self, now: float) -> bool:
+        """Take the lease if free / expired, or extend it if we hold it."""
+
+    @abstractmethod
+    def _release(self) -> None:
+        """Expire the lease now (only if we hold it)."""
+
+    @abstractmethod
+    def update_meta(self, **fields: Any) -> None:
+        """Store run metadata on the lease (only while leader)."""
+
+    @abstractmethod
+    def read(self) -> Dict[str, Any]:
+        """Current holder, expiry and run metadata ({} if never acquired)."""
+
+
+class MongoLease(_Lease):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        from mongodb import get_db
+        self._collection = get_db()["orchestrator_leases"]
+
+    def _acquire_or_renew(self, now: float) -> bool:
+        from pymongo.errors import DuplicateKeyError
+
+        try:
+            # matches only if we already hold it or it has expired; otherwise the
+            # upsert collides on _id and we know someone else holds a live lease
+            self._collection.update_one(
+                {
+                    "_id": self.name,
+                    "$or": [{"holder": self.instance_id}, {"expires_at": {"$lt": now}}],
+                },
+                {"$set": {"holder": self.instance_id, "expires_at": now + LEASE_TTL_SEC, "renewed_at": now}},
+                upsert=True,
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    def _release(self) -> None:
+        self._collection.update_one(
+            {"_id": self.name, "holder": self.instance_id},
+            {"$set": {"expires_at": 0}},
+        )
+
+    def update_meta(self, **fields: Any) -> None:
+        self._collection.update_one(
+            {"_id": self.name, "holder": self.instance_id},
+            {"$set": {f"meta.{k}": v for k, v in fields.items()}},
+        )
+
+    def read(self) -> Dict[str, Any]:
+        doc = self._collection.find_one({"_id": self.name}) or {}
+        doc.pop("_id", None)
+        return doc
+
+
+class SqliteLease(_Lease):
+    def __init__(self, *args, path: str = AGENT_OUTPUT_DB, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._path = path
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS orchestrator_leases ("
+                " name TEXT PRIMARY KEY, holder TEXT, expires_at REAL, renewed_at REAL, meta TEXT)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self._path, timeout=10, isolation_level=None)
+
+    def _acquire_or_renew(self, now: float) -> bool:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT holder, expires_at FROM orchestrator_leases WHERE name = ?", (self.name,)
+            ).fetchone()
+            if row and row[0] != self.instance_id and row[1] >= now:
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute(
+                "INSERT INTO orchestrator_leases (name, holder, expires_at, renewed_at, meta) VALUES (?, ?, ?, ?, '{}')"
+                " ON CONFLICT(name) DO UPDATE SET holder = excluded.holder,"
+                " expires_at = excluded.expires_at, renewed_at = excluded.renewed_at",
+                (self.name, self.instance_id, now + LEASE_TTL_SEC, now),
+            )
+            conn.execute("COMMIT")
+            return True
+        finally:
+            conn.close()
+
+    def _release(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE orchestrator_leases SET expires_at = 0 WHERE name = ? AND holder = ?",
+                (self.name, self.instance_id),
+            )
+
+    def update_meta(self, **fields: Any) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT meta FROM orchestrator_leases WHERE name = ? AND holder = ?",
+                (self.name, self.instance_id),
+            ).fetchone()
+            if row:
+                meta = json.loads(row[0] or "{}")
+                meta.update(fields)
+                conn.execute(
+                    "UPDATE orchestrator_leases SET meta = ? WHERE name = ?",
+                    (json.dumps(meta), self.name),
+                )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def read(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT holder, expires_at, renewed_at, meta FROM orchestrator_leases WHERE name = ?",
+                (self.name,),
+            ).fetchone()
+        if not row:
+            return {}
+        return {
+            "holder": row[0],
+            "expires_at": row[1],
+            "renewed_at": row[2],
+            "meta": json.loads(row[3] or "{}"),
+        }
+
+
+def get_lease(name: str = LEASE_NAME) -> _Lease:
+    return MongoLease(name) if AGENT_OUTPUT_STORE == "mongo" else SqliteLease(name)
+
+
+_reader: _Lease | None = None
+
+
+def lease_status(name: str = LEASE_NAME) -> Dict[str, Any]:
+    """Read-only view of the lease + run metadata, for the API."""
+    global _reader
+    if _reader is None:
+        _reader = get_lease(name)
+
+    record = _reader.read()
+    if not record:
+        return {"leader_id": None, "is_live": False, "meta": {}}
+
+    now = time.time()
+    return {
+        "leader_id": record.get("holder"),
+        "is_live": (record.get("expires_at") or 0) > now,
+        "lease_expires_in_sec": round((record.get("expires_at") or 0) - now, 1),
+        "last_heartbeat_at": record.get("renewed_at"),
+        "meta": record.get("meta", {}),
+    }
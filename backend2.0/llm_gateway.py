@@ -0,0 +1,217 @@
+# llm_gateway.py
+"""
+Single choke point for every Gemini call (all of them go through Model.ask_hf_model).
+
+- Token-bucket rate limiting sized to our Gemini quota (GEMINI_RPM).
+- Priority classes: INTERACTIVE callers are always served before BACKGROUND ones,
+  and BACKGROUND calls leave a small reserve of tokens for interactive bursts.
+- Single-flight: identical prompts already in flight share one upstream call.
+
+Limits are per process, so each process calls configure() once at start:
+  - the orchestrator uses BACKGROUND and gets GEMINI_BACKGROUND_SHARE of the quota;
+  - API workers and task workers use INTERACTIVE and split the rest evenly
+    between GEMINI_INTERACTIVE_PROCESSES processes (default API_WORKERS + TASK_WORKERS),
+so all processes together stay within GEMINI_RPM.
+"""
+import contextvars
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "15"))
+GEMINI_BACKGROUND_SHARE = float(os.getenv("GEMINI_BACKGROUND_SHARE", "0.3"))
+GEMINI_INTERACTIVE_PROCESSES = max(1, int(os.getenv(
+    "GEMINI_INTERACTIVE_PROCESSES",
+    int(os.getenv("API_WORKERS", "1")) + int(os.getenv("TASK_WORKERS", "2")),
+)))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "60"))
+
+
+class RateLimitTimeout(RuntimeError):
+    """Raised when a call waited longer than LLM_QUEUE_TIMEOUT for a token."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with strict priority between waiters.
+    A waiter only takes a token when no higher-priority waiter is queued.
+    """
+
+    def __init__(self, rate_per_sec: float, capacity: float, background_reserve: float = 1.0):
+        self.rate = rate_per_sec
+        self.capacity = capacity
+        self.background_reserve = background_reserve
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._waiting = [0, 0]
+        self._cond = threading.Condition()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority: int = INTERACTIVE, timeout: float | None = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        needed = 1.0 if priority == INTERACTIVE else max(1.0, min(1.0 + self.background_reserve, self.capacity))
+
+        with self._cond:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    self._refill()
+                    higher_waiting = any(self._waiting[p] for p in range(priority))
+                    if not higher_waiting and self._tokens >= needed:
+                        self._tokens -= 1.0
+                        return True
+
+                    wait_for = max((needed - self._tokens) / self.rate, 0.01)
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return False
+                        wait_for = min(wait_for, remaining)
+                    self._cond.wait(wait_for)
+            finally:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> tuple[Any, bool]:
+        """Returns (result, shared) where shared=True if another caller did the work."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+
+_priority: contextvars.ContextVar[int | None] = contextvars.ContextVar("llm_priority", default=None)
+_default_priority = INTERACTIVE
+_bucket: TokenBucket | None = None
+_bucket_lock = threading.Lock()
+_flights = SingleFlight()
+
+_stats_lock = threading.Lock()
+_stats = {"calls": 0, "upstream_calls": 0, "coalesced": 0, "throttle_wait_sec": 0.0, "rejected": 0}
+
+
+def configure(role: int, share: float | None = None) -> None:
+    """
+    Set this process's default priority and its share of GEMINI_RPM.
+    Call once at process start. `share` overrides the default split
+    (see module docstring).
+    """
+    global _default_priority, _bucket
+    if share is None:
+        if role == BACKGROUND:
+            share = GEMINI_BACKGROUND_SHARE
+        else:
+            share = (1 - GEMINI_BACKGROUND_SHARE) / GEMINI_INTERACTIVE_PROCESSES
+    rpm = max(GEMINI_RPM * share, 1.0)
+    with _bucket_lock:
+        _default_priority = role
+        _bucket = TokenBucket(rate_per_sec=rpm / 60, capacity=max(1.0, rpm / 4))
+
+
+def _get_bucket() -> TokenBucket:
+    if _bucket is None:
+        # a process that never called configure() still counts as one interactive process
+        print("[WARN] llm_gateway.configure() was not called; using an interactive share.")
+        configure(INTERACTIVE)
+    return _bucket
+
+
+@contextmanager
+def llm_priority(priority: int):
+    """Override the priority for LLM calls made inside this block."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def call(backend: str, model: str, prompt: str, fn: Callable[[], str]) -> str:
+    """
+    Run `fn` (the raw SDK call) through single-flight + the rate limiter.
+    `backend`, `model` and `prompt` together identify identical requests.
+    """
+    key = hashlib.sha256(f"{backend}\0{model}\0{prompt}".encode("utf-8")).hexdigest()
+    priority = _priority.get()
+    if priority is None:
+        priority = _default_priority
+
+    def limited() -> str:
+        started = time.monotonic()
+        if not _get_bucket().acquire(priority, timeout=LLM_QUEUE_TIMEOUT):
+            _bump("rejected")
+            raise RateLimitTimeout(f"LLM quota wait exceeded {LLM_QUEUE_TIMEOUT:.0f}s")
+        _bump("throttle_wait_sec", time.monotonic() - started)
+        _bump("upstream_calls")
+        return fn()
+
+    _bump("calls")
+    result, shared = _flights.do(key, limited)
+    if shared:
+        _bump("coalesced")
+    return result
+
+
+def try_acquire(priority: int | None = None) -> bool:
+    """Take a token only if one is free right now (used for hedged duplicates)."""
+    if priority is None:
+        priority = _priority.get()
+    if priority is None:
+        priority = _default_priority
+    return _get_bucket().acquire(priority, timeout=0)
+
+
+def stats() -> Dict[str, Any]:
+    with _stats_lock:
+        return dict(_stats, throttle_wait_sec=round(_stats["throttle_wait_sec"], 3))
+
+
+def _bump(name: str, amount: float = 1) -> None:
+    with _stats_lock:
+        _stats[name] += amount
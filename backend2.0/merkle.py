@@ -0,0 +1,206 @@
+# merkle.py
+"""
+Incremental Merkle accumulator for chain blocks / HR events.
+
+Byte-compatible with Hydra-head/orchestrator/merkle.js:
+  - hash(obj)          -> sha256(JSON.stringify(obj)) as hex
+  - combineHash(a, b)  -> sha256(a + b) over the two hex strings
+  - odd nodes are paired with themselves (R = L) when building a layer
+"""
+import hashlib
+import json
+import math
+import threading
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List
+
+# JS engines list "array index" keys first, in ascending order
+_MAX_ARRAY_INDEX = 2 ** 32 - 2
+
+
+def _js_number(value: float | int) -> str:
+    """Number::toString as used by JSON.stringify (5.0 → "5", 1e-07 → "1e-7")."""
+    if isinstance(value, int) and abs(value) <= 2 ** 53:
+        return str(value)
+    value = float(value)   # larger ints are doubles in JS too
+    if not math.isfinite(value):
+        raise ValueError(f"Cannot hash non-finite number {value!r} (JSON.stringify would write null)")
+    if value == 0:
+        return "0"
+
+    sign = "-" if value < 0 else ""
+    _, digits, exponent = Decimal(repr(abs(value))).as_tuple()
+    d = "".join(map(str, digits)).rstrip("0")
+    exponent += len(digits) - len(d)
+    k, n = len(d), exponent + len(d)   # value = 0.d × 10^n
+
+    if k <= n <= 21:
+        out = d + "0" * (n - k)
+    elif 0 < n <= 21:
+        out = d[:n] + "." + d[n:]
+    elif -6 < n <= 0:
+        out = "0." + "0" * -n + d
+    else:
+        e = n - 1
+        out = (d[0] + ("." + d[1:] if k > 1 else "")) + ("e+" if e > 0 else "e-") + str(abs(e))
+    return sign + out
+
+
+def _js_key(key: Any) -> str:
+    if isinstance(key, str):
+        return key
+    if key is None or isinstance(key, bool):
+        return json.dumps(key)
+    if isinstance(key, (int, float)):
+        return _js_number(key)
+    raise TypeError(f"keys must be str, int, float, bool or None, not {type(key).__name__}")
+
+
+def _is_array_index(key: str) -> bool:
+    return key.isdigit() and key.isascii() and (key == "0" or key[0] != "0") and int(key) <= _MAX_ARRAY_INDEX
+
+
+def js_stringify(obj: Any) -> str:
+    """
+    JSON.stringify(obj) for JSON-like Python values: no whitespace, unicode kept
+    as-is, JS number formatting and JS object key order. Non-finite numbers are
+    rejected instead of silently becoming null.
+    """
+    if obj is None or isinstance(obj, bool):
+        return json.dumps(obj)
+    if isinstance(obj, (int, float)):
+        return _js_number(obj)
+    if isinstance(obj, str):
+        return json.dumps(obj, ensure_ascii=False)
+    if isinstance(obj, (list, tuple)):
+        return "[" + ",".join(js_stringify(v) for v in obj) + "]"
+    if isinstance(obj, dict):
+        items = {_js_key(k): v for k, v in obj.items()}
+        indices = sorted((k for k in items if _is_array_index(k)), key=int)
+        keys = indices + [k for k in items if not _is_array_index(k)]
+        return "{" + ",".join(json.dumps(k, ensure_ascii=False) + ":" + js_stringify(items[k]) for k in keys) + "}"
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def hash_obj(obj: Any) -> str:
+    """
+    Python equivalent of JS `hash(obj)`: sha256 over js_stringify(obj),
+    UTF-8 encoded (as CryptoJS does).
+    """
+    return hashlib.sha256(js_stringify(obj).encode("utf-8")).hexdigest()
+
+
+def combine_hash(a: str, b: str) -> str:
+    """Python equivalent of JS `combineHash(a, b)`."""
+    return hashlib.sha256((a + b).encode("utf-8")).hexdigest()
+
+
+def build_merkle_root(hashes: List[str]) -> str | None:
+    """
+    One-shot root over a list of leaf hashes (same result as JS `buildMerkleRoot`).
+    """
+    if not hashes:
+        return None
+
+    layer = list(hashes)
+    while len(layer) > 1:
+        layer = [
+            combine_hash(layer[i], layer[i + 1] if i + 1 < len(layer) else layer[i])
+            for i in range(0, len(layer), 2)
+        ]
+    return layer[0]
+
+
+def verify_proof(leaf: str, proof: List[Dict[str, str]], root: str) -> bool:
+    """
+    Check an inclusion proof produced by MerkleAccumulator.proof().
+    Each step is {"hash": <sibling hex>, "position": "left" | "right"}.
+    """
+    current = leaf
+    for step in proof:
+        if step["position"] == "left":
+            current = combine_hash(step["hash"], current)
+        else:
+            current = combine_hash(current, step["hash"])
+    return current == root
+
+
+class MerkleAccumulator:
+    """
+    Append-only Merkle tree that keeps every internal layer cached.
+
+    - append(): O(log n), only the right-most path is recomputed
+    - extend(): batch append, each affected parent is hashed once
+    - proof():  O(log n) sibling path for any leaf
+    """
+
+    def __init__(self, leaves: Iterable[str] | None = None):
+        self._layers: List[List[str]] = [[]]
+        self._lock = threading.Lock()
+        if leaves:
+            self.extend(leaves)
+
+    def __len__(self) -> int:
+        return len(self._layers[0])
+
+    @property
+    def root(self) -> str | None:
+        if not self._layers[0]:
+            return None
+        return self._layers[-1][0]
+
+    def leaf(self, index: int) -> str:
+        return self._layers[0][index]
+
+    def append(self, leaf: str) -> str:
+        """Add one leaf hash and return the new root."""
+        with self._lock:
+            self._layers[0].append(leaf)
+            self._rehash_from(len(self._layers[0]) - 1)
+            return self._layers[-1][0]
+
+    def extend(self, leaves: Iterable[str]) -> str | None:
+        """Add many leaf hashes in one pass and return the new root."""
+        with self._lock:
+            start = len(self._layers[0])
+            self._layers[0].extend(leaves)
+            if len(self._layers[0]) > start:
+                self._rehash_from(start)
+            return self.root
+
+    def proof(self, index: int) -> List[Dict[str, str]]:
+        """Sibling path from leaf `index` up to (but excluding) the root."""
+        with self._lock:
+            if index < 0 or index >= len(self._layers[0]):
+                raise IndexError(f"Leaf index {index} out of range")
+
+            path = []
+            for layer in self._layers[:-1]:
+                if index % 2 == 0:
+                    sibling = layer[index + 1] if index + 1 < len(layer) else layer[index]
+                    path.append({"hash": sibling, "position": "right"})
+                else:
+                    path.append({"hash": layer[index - 1], "position": "left"})
+                index //= 2
+            return path
+
+    def _rehash_from(self, start: int) -> None:
+        """
+        Recompute every parent whose subtree contains a leaf at index >= start.
+        Layers are grown on demand; nodes left of `start` stay cached.
+        """
+        level = 0
+        while len(self._layers[level]) > 1:
+            layer = self._layers[level]
+            if level + 1 == len(self._layers):
+                self._layers.append([])
+            parents = self._layers[level + 1]
+
+            first_parent = start // 2
+            del parents[first_parent:]
+            for i in range(first_parent * 2, len(layer), 2):
+                right = layer[i + 1] if i + 1 < len(layer) else layer[i]
+                parents.append(combine_hash(layer[i], right))
+
+            start = first_parent
+            level += 1
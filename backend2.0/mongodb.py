@@ -1,12 +1,18 @@
 # mongodb.py
-from datetime import datetime
-from typing import List, Dict, Any
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Iterator
 
+import hashlib
 import os
+import threading
+import zlib
 from dotenv import load_dotenv
-from pymongo import MongoClient, ReturnDocument
+from pymongo import MongoClient, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
 
-from bson import ObjectId
+from bson import Binary, ObjectId
+
+from search_index import ResumeIndex, highlight, tokenize
 
 load_dotenv()
 
@@ -14,14 +20,78 @@ load_dotenv()
 MONGODB_URI = os.getenv("MONGODB_URI")
 DB_NAME = os.getenv("MONGODB_DB_NAME", "orbit1_jobs_db")
 
-if not MONGODB_URI:
-    raise RuntimeError("MONGODB_URI is not set in .env")
+_client: MongoClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_db():
+    """
+    Connect on first use instead of at import time, so the API can boot
+    (and report not-ready on /readyz) even when Mongo is missing or slow.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                if not MONGODB_URI:
+                    raise RuntimeError("MONGODB_URI is not set in .env")
+                _client = MongoClient(MONGODB_URI, serverSelectionTimeoutMS=5000)
+    return _client[DB_NAME]
+
+
+def ping() -> None:
+    """Round-trip to the server; raises if Mongo is unreachable."""
+    get_db().client.admin.command("ping")
+
+
+class _LazyCollection:
+    """Resolves the real collection on first attribute access."""
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_db()[self._name], attr)
 
-client = MongoClient(MONGODB_URI)
-db = client[DB_NAME]
 
 # Collection where we store job applications
-applications_collection = db["job_applications"]
+applications_collection = _LazyCollection("job_applications")
+
+# Full resume bodies live here, zlib-compressed, keyed by the application _id.
+# job_applications only keeps a short preview so listings/scans stay small.
+resume_texts_collection = _LazyCollection("resume_texts")
+
+# Content-addressed extracted text: _id = SHA-256 of the uploaded file bytes.
+# Applications reference it via resume.sha256, so the same CV sent to several
+# jobs is parsed and stored once (resume_texts remains for older applications).
+resume_blobs_collection = _LazyCollection("resume_blobs")
+
+# Hiring-funnel counters, kept current with $inc on every write (see below)
+funnel_collection = _LazyCollection("funnel_rollups")
+
+RESUME_PREVIEW_CHARS = 300
+
+# Never pull legacy inline resume_text into metadata reads
+METADATA_PROJECTION = {"resume_text": 0}
+
+# In-process BM25 index over resume_text (built lazily, then kept up to date).
+# Each process has its own copy: applications written elsewhere are picked up on
+# the next search (see _sync_resume_index); a status filter runs on this copy
+# and every hit's status is re-verified against Mongo.
+resume_index = ResumeIndex()
+_resume_index_lock = threading.Lock()
+_resume_index_synced_to: datetime | None = None
+_created_at_index_ready = False
+
+# created_at comes from each writer's clock and inserts commit out of order,
+# so every sync re-reads this much history (already-indexed ids are skipped)
+RESUME_INDEX_OVERLAP = timedelta(seconds=float(os.getenv("RESUME_INDEX_OVERLAP_SEC", "300")))
+
+# widen the hit window this many times when Mongo re-verification drops stale hits
+SEARCH_WIDEN_ROUNDS = 3
+
+# read → conditional-write rounds per bulk status change (retries ids changed concurrently)
+STATUS_UPDATE_ROUNDS = 3
 
 
 def serialize_application(doc: Dict[str, Any]) -> Dict[str, Any]:
@@ -44,7 +114,7 @@ def serialize_application(doc: Dict[str, Any]) -> Dict[str, Any]:
             "filename": doc.get("resume", {}).get("filename"),
             "content_type": doc.get("resume", {}).get("content_type"),
         },
-        "resume_text": doc.get("resume_text"),  # ✅ extracted text
+        "resume_preview": doc.get("resume_preview"),  # ✅ first few hundred chars; full text is loaded lazily
 
         # ✅ NEW: include status so UI can see it on refresh
         "status": doc.get("status"),
@@ -65,36 +135,249 @@ def create_application(
     resume_text: str,          # ✅ extracted text instead of bytes
     resume_filename: str,
     resume_content_type: str,
+    resume_hash: str | None = None,
 ) -> str:
     """
-    Insert a new application into MongoDB, storing the extracted resume text.
+    Insert a new application into MongoDB.
+    Metadata + a short preview go to job_applications; the full extracted
+    resume text is stored compressed in resume_blobs under resume_hash
+    (once per distinct file), or in resume_texts when no hash is given.
     """
-    doc = {
+    doc = _build_application_doc(
+        job_id=job_id,
+        job_title=job_title,
+        full_name=full_name,
+        phone=phone,
+        years_exp=years_exp,
+        resume_text=resume_text,
+        resume_filename=resume_filename,
+        resume_content_type=resume_content_type,
+        resume_hash=resume_hash,
+    )
+
+    if resume_hash:
+        save_resume_blobs({resume_hash: resume_text})
+    result = applications_collection.insert_one(doc)
+    if not resume_hash:
+        save_resume_text(result.inserted_id, resume_text)   # ✅ text from extracttext.py
+    _record_new_applications([doc])
+
+    # ✅ keep the search index current without a rebuild
+    resume_index.add(
+        str(result.inserted_id),
+        resume_text,
+        job_id=job_id,
+        years_exp=years_exp,
+    )
+
+    return str(result.inserted_id)
+
+
+def create_applications_bulk(applications: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Insert many applications with batched writes (metadata + resume texts).
+    Each item takes the same keyword arguments as create_application().
+    Returns {"inserted_ids": [...], "errors": [{"index": i, "error": msg}, ...]};
+    the insert is unordered, so one rejected document doesn't stop the others.
+    """
+    if not applications:
+        return {"inserted_ids": [], "errors": []}
+
+    save_resume_blobs({
+        item["resume_hash"]: item["resume_text"]
+        for item in applications
+        if item.get("resume_hash")
+    })
+
+    docs = [_build_application_doc(**item) for item in applications]
+    errors = []
+    try:
+        applications_collection.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        errors = [
+            {"index": err["index"], "error": err.get("errmsg", "Insert failed")}
+            for err in e.details.get("writeErrors", [])
+        ]
+
+    # insert_many sets _id on each doc; keep only the ones that were written
+    failed = {err["index"] for err in errors}
+    inserted = [(doc, item) for i, (doc, item) in enumerate(zip(docs, applications)) if i not in failed]
+
+    unhashed = [
+        _resume_text_doc(doc["_id"], item["resume_text"])
+        for doc, item in inserted
+        if not item.get("resume_hash")
+    ]
+    if unhashed:
+        resume_texts_collection.insert_many(unhashed, ordered=False)
+    _record_new_applications([doc for doc, _ in inserted])
+
+    for doc, item in inserted:
+        resume_index.add(
+            str(doc["_id"]),
+            item["resume_text"],
+            job_id=item["job_id"],
+            years_exp=item["years_exp"],
+        )
+
+    return {"inserted_ids": [str(doc["_id"]) for doc, _ in inserted], "errors": errors}
+
+
+def _build_application_doc(
+    job_id: str,
+    job_title: str | None,
+    full_name: str,
+    phone: str,
+    years_exp: int,
+    resume_text: str,
+    resume_filename: str,
+    resume_content_type: str,
+    resume_hash: str | None = None,
+) -> Dict[str, Any]:
+    resume = {
+        "filename": resume_filename,
+        "content_type": resume_content_type,
+    }
+    if resume_hash:
+        resume["sha256"] = resume_hash
+    return {
         "job_id": job_id,
         "job_title": job_title,
         "full_name": full_name,
         "phone": phone,
         "years_exp": years_exp,
-        "resume": {
-            "filename": resume_filename,
-            "content_type": resume_content_type,
-        },
-        "resume_text": resume_text,          # ✅ text from extracttext.py
+        "resume": resume,
+        "resume_preview": resume_text[:RESUME_PREVIEW_CHARS],
         "created_at": datetime.utcnow(),
     }
 
-    result = applications_collection.insert_one(doc)
-    return str(result.inserted_id)
-
 
 def get_applications_by_job_id(job_id: str) -> List[Dict[str, Any]]:
     """
     Fetch all applications for a given job_id.
     """
-    docs = applications_collection.find({"job_id": job_id}).sort("created_at", -1)
+    docs = applications_collection.find({"job_id": job_id}, METADATA_PROJECTION).sort("created_at", -1)
     return [serialize_application(d) for d in docs]
 
 
+# Export column → document path. Resume text is never part of an export.
+EXPORT_FIELDS = {
+    "id": "_id",
+    "job_id": "job_id",
+    "job_title": "job_title",
+    "full_name": "full_name",
+    "phone": "phone",
+    "years_exp": "years_exp",
+    "created_at": "created_at",
+    "status": "status",
+    "resume_filename": "resume.filename",
+    "resume_content_type": "resume.content_type",
+    "resume_preview": "resume_preview",
+    "prescreen_score": "prescreen.score",
+    "assessment_result": "assessment_result",
+}
+EXPORT_BATCH_SIZE = 500
+
+
+def iter_applications_for_export(
+    job_id: str,
+    fields: List[str],
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one flat dict per application of a job, with only `fields`
+    (keys of EXPORT_FIELDS). Reads through a batched cursor with a projection,
+    so memory stays flat however many applications there are.
+    """
+    paths = {field: EXPORT_FIELDS[field] for field in fields}
+    projection = {path: 1 for path in paths.values()}
+    if "_id" not in projection:
+        projection["_id"] = 0
+
+    cursor = applications_collection.find({"job_id": job_id}, projection, batch_size=batch_size)
+    try:
+        for doc in cursor:
+            row = {}
+            for field, path in paths.items():
+                value: Any = doc
+                for part in path.split("."):
+                    value = value.get(part) if isinstance(value, dict) else None
+                row[field] = str(value) if isinstance(value, ObjectId) else value
+            yield row
+    finally:
+        cursor.close()
+
+
+def save_resume_text(application_id: ObjectId, resume_text: str) -> None:
+    """
+    Store the full resume text compressed, keyed by application _id.
+    """
+    resume_texts_collection.replace_one(
+        {"_id": application_id},
+        _resume_text_doc(application_id, resume_text),
+        upsert=True,
+    )
+
+
+def _resume_text_doc(application_id: ObjectId | str, resume_text: str) -> Dict[str, Any]:
+    raw = (resume_text or "").encode("utf-8")
+    return {
+        "_id": application_id,
+        "codec": "zlib",
+        "size": len(raw),
+        "data": Binary(zlib.compress(raw, 6)),
+    }
+
+
+def resume_hash(data: bytes) -> str:
+    """Content address of an uploaded resume file (hex SHA-256 of its bytes)."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def get_cached_resume_texts(hashes: List[str]) -> Dict[str, str]:
+    """Already-extracted text for the given file hashes (missing hashes are left out)."""
+    if not hashes:
+        return {}
+    return {
+        d["_id"]: _decode_resume_text(d)
+        for d in resume_blobs_collection.find({"_id": {"$in": list(set(hashes))}})
+    }
+
+
+def save_resume_blobs(texts_by_hash: Dict[str, str]) -> None:
+    """
+    Store extracted text once per file hash. $setOnInsert makes this a no-op
+    for hashes that already exist, so concurrent uploads of one CV are safe.
+    """
+    if not texts_by_hash:
+        return
+    now = datetime.utcnow()
+    ops = [
+        UpdateOne(
+            {"_id": h},
+            {"$setOnInsert": {**_resume_text_doc(h, text), "created_at": now}},
+            upsert=True,
+        )
+        for h, text in texts_by_hash.items()
+    ]
+    resume_blobs_collection.bulk_write(ops, ordered=False)
+
+
+def _decode_resume_text(doc: Dict[str, Any]) -> str:
+    if doc.get("codec") == "zlib":
+        return zlib.decompress(doc["data"]).decode("utf-8")
+    return doc.get("text") or ""
+
+
+def load_resume_text(application_id: str) -> str | None:
+    """
+    Lazily load the full resume text for one application.
+    Falls back to the old inline resume_text field for unmigrated documents.
+    """
+    texts = get_resume_texts([application_id]) if ObjectId.is_valid(application_id) else {}
+    return texts.get(application_id)
+
+
 def get_application_file(application_id: str) -> Dict[str, Any] | None:
     """
     Get stored resume metadata + text for a given application.
@@ -105,7 +388,7 @@ def get_application_file(application_id: str) -> Dict[str, Any] | None:
     except Exception:
         return None
 
-    doc = applications_collection.find_one({"_id": oid})
+    doc = applications_collection.find_one({"_id": oid}, {"resume": 1})
     if not doc:
         return None
 
@@ -113,7 +396,7 @@ def get_application_file(application_id: str) -> Dict[str, Any] | None:
     return {
         "filename": resume.get("filename"),
         "content_type": resume.get("content_type"),
-        "text": doc.get("resume_text"),  # ✅ return extracted text
+        "text": load_resume_text(application_id),  # ✅ decompressed only when asked for
     }
 
 
@@ -125,13 +408,14 @@ def get_application_by_id(application_id: str) -> Dict[str, Any] | None:
     """
     Fetch a single application document by its MongoDB _id.
     This is what /applications/{application_id}/assessment/start uses.
+    The full resume text is not included; use load_resume_text() for it.
     """
     try:
         oid = ObjectId(application_id)
     except Exception:
         return None
 
-    return applications_collection.find_one({"_id": oid})
+    return applications_collection.find_one({"_id": oid}, METADATA_PROJECTION)
 
 
 def save_assessment_for_application(
@@ -165,11 +449,16 @@ def save_assessment_for_application(
     if result is not None:
         update_fields["assessment_result"] = result
 
-    applications_collection.update_one(
+    before = applications_collection.find_one_and_update(
         {"_id": oid},
         {"$set": update_fields},
+        projection={"assessment_result": 1},
+        return_document=ReturnDocument.BEFORE,
     )
 
+    if before is not None and result is not None:
+        _record_assessment_score(before.get("assessment_result"), result)
+
 
 def update_application_status(application_id: str, status: str):
     """
@@ -182,14 +471,516 @@ def update_application_status(application_id: str, status: str):
         # invalid ObjectId string
         return None
 
+    # BEFORE → we learn the previous status for the funnel in the same round-trip
     result = applications_collection.find_one_and_update(
         {"_id": oid},
         {"$set": {"status": status}},
-        return_document=ReturnDocument.AFTER,
+        projection=METADATA_PROJECTION,
+        return_document=ReturnDocument.BEFORE,
     )
 
     if not result:
         return None
 
+    _record_status_changes([(result.get("status"), status)])
+    result["status"] = status
+    resume_index.set_status(application_id, status)
+
     # ✅ convert MongoDB doc → JSON-safe dict
     return serialize_application(result)
+
+
+def update_application_statuses(updates: List[Dict[str, str]]) -> Dict[str, Any]:
+    """
+    Apply many status changes with a handful of bulk writes.
+    `updates` is a list of {"id": application_id, "status": status}; if an id
+    appears more than once, its last status wins.
+    Returns matched / modified counts and any ids that aren't valid ObjectIds.
+
+    Current statuses are read once and ids grouped by (old, new) status; each
+    group is one conditional update_many on `status: old`, so its
+    modified_count is exactly the number of old → new transitions for the
+    funnel. Ids changed concurrently between the read and the write don't
+    match and are re-read and retried (up to STATUS_UPDATE_ROUNDS times).
+    """
+    latest: Dict[ObjectId, str] = {}
+    invalid_ids = []
+    for item in updates:
+        try:
+            oid = ObjectId(item["id"])
+        except Exception:
+            invalid_ids.append(item["id"])
+            continue
+        latest[oid] = item["status"]
+
+    matched: set = set()
+    modified = 0
+    pending = list(latest)
+    for _ in range(STATUS_UPDATE_ROUNDS):
+        if not pending:
+            break
+        groups: Dict[tuple, List[ObjectId]] = {}
+        for doc in applications_collection.find({"_id": {"$in": pending}}, {"status": 1}):
+            groups.setdefault((doc.get("status"), latest[doc["_id"]]), []).append(doc["_id"])
+
+        pending = []
+        for (old, new), ids in groups.items():
+            matched.update(ids)
+            if old == new:
+                continue
+            result = applications_collection.update_many(
+                {"_id": {"$in": ids}, "status": old},
+                {"$set": {"status": new}},
+            )
+            # book each group as soon as it is written, so a later failure can't skip it
+            modified += result.modified_count
+            _record_status_changes([(old, new)] * result.modified_count)
+            retry = set()
+            if result.modified_count < len(ids):
+                # someone else changed some of these in between → retry those from their new status
+                retry = {
+                    d["_id"]
+                    for d in applications_collection.find({"_id": {"$in": ids}}, {"status": 1})
+                    if d.get("status") != new
+                }
+                pending.extend(retry)
+            for oid in ids:
+                if oid not in retry:
+                    resume_index.set_status(str(oid), new)
+
+    return {
+        "matched": len(matched),
+        "modified": modified,
+        "invalid_ids": invalid_ids,
+    }
+
+
+# =========================
+# 🔹 Per-job status counts
+# =========================
+
+APPLICATION_STATUSES = ("Pending", "Onboarding", "Rejected")
+
+_status_index_ready = False
+
+
+def _ensure_status_index() -> None:
+    """(job_id, status) index so the stats pipeline never scans the collection."""
+    global _status_index_ready
+    if not _status_index_ready:
+        applications_collection.create_index([("job_id", 1), ("status", 1)])
+        _status_index_ready = True
+
+
+def get_application_stats(job_id: str) -> Dict[str, Any]:
+    """
+    Count applications per status for a job with an aggregation pipeline.
+    Only (job_id, status) is touched, so this is answered from the index.
+    """
+    _ensure_status_index()
+
+    pipeline = [
+        {"$match": {"job_id": job_id}},
+        # applications without a status are shown as "Pending" in the UI
+        {"$group": {"_id": {"$ifNull": ["$status", "Pending"]}, "count": {"$sum": 1}}},
+    ]
+    counts = {status: 0 for status in APPLICATION_STATUSES}
+    for row in applications_collection.aggregate(pipeline):
+        counts[row["_id"]] = counts.get(row["_id"], 0) + row["count"]
+
+    return {"job_id": job_id, "total": sum(counts.values()), "counts": counts}
+
+
+# =========================
+# 🔹 Full-text candidate search
+# =========================
+
+def _sync_resume_index() -> None:
+    """
+    Index every application created since the last sync.
+    First call builds the whole index; later calls read created_at from
+    RESUME_INDEX_OVERLAP before the newest one seen, so applications created by
+    other workers / hosts (ObjectIds aren't monotonic across processes) or
+    committed late are still picked up.
+    """
+    global _created_at_index_ready
+
+    with _resume_index_lock:
+        if not _created_at_index_ready:
+            applications_collection.create_index("created_at")
+            _created_at_index_ready = True
+
+        query = {}
+        if _resume_index_synced_to is not None:
+            query = {"created_at": {"$gte": _resume_index_synced_to - RESUME_INDEX_OVERLAP}}
+        cursor = applications_collection.find(
+            query,
+            {"job_id": 1, "status": 1, "years_exp": 1, "created_at": 1},
+        ).batch_size(1000)
+
+        batch: List[Dict[str, Any]] = []
+        for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= 1000:
+                _index_batch(batch)
+                batch = []
+        if batch:
+            _index_batch(batch)
+
+
+def _index_batch(docs: List[Dict[str, Any]]) -> None:
+    global _resume_index_synced_to
+
+    for doc in docs:
+        created_at = doc.get("created_at")
+        if created_at and (_resume_index_synced_to is None or created_at > _resume_index_synced_to):
+            _resume_index_synced_to = created_at
+
+    new_docs = [d for d in docs if str(d["_id"]) not in resume_index]
+    if not new_docs:
+        return
+    texts = get_resume_texts([str(d["_id"]) for d in new_docs])
+    for doc in new_docs:
+        resume_index.add(
+            str(doc["_id"]),
+            texts.get(str(doc["_id"]), ""),
+            job_id=doc.get("job_id"),
+            status=doc.get("status"),
+            years_exp=doc.get("years_exp"),
+        )
+
+
+def search_applications(
+    query: str,
+    job_id: str | None = None,
+    status: str | None = None,
+    min_years: int | None = None,
+    limit: int = 20,
+) -> List[Dict[str, Any]]:
+    """
+    BM25-ranked search over resume_text with optional filters.
+    Returns small projected docs with highlight snippets (no full resume_text).
+    """
+    _sync_resume_index()
+
+    projection = {
+        "job_id": 1,
+        "job_title": 1,
+        "full_name": 1,
+        "years_exp": 1,
+        "status": 1,
+        "created_at": 1,
+    }
+    terms = tokenize(query)
+
+    # the index filters on its copy of status (kept current by set_status and
+    # the sync), so no matching candidate is cut off below the top hits; Mongo
+    # re-verifies it, and if stale entries drop results we widen the window
+    want = limit * 2
+    for _ in range(SEARCH_WIDEN_ROUNDS):
+        hits = resume_index.search(query, job_id=job_id, status=status, min_years=min_years, limit=want)
+        if not hits:
+            return []
+
+        mongo_filter: Dict[str, Any] = {"_id": {"$in": [ObjectId(doc_id) for doc_id, _ in hits]}}
+        if job_id is not None:
+            mongo_filter["job_id"] = job_id
+        if min_years is not None:
+            mongo_filter["years_exp"] = {"$gte": min_years}
+
+        docs = {str(d["_id"]): d for d in applications_collection.find(mongo_filter, projection)}
+        for doc_id, doc in docs.items():
+            resume_index.set_status(doc_id, doc.get("status"))
+        if status is not None:
+            # applications without a status are shown as "Pending" in the UI
+            docs = {k: d for k, d in docs.items() if (d.get("status") or "Pending") == status}
+
+        matched = [(doc_id, score) for doc_id, score in hits if doc_id in docs][:limit]
+        if len(matched) >= limit or len(hits) < want:
+            break
+        want *= 4
+
+    texts = get_resume_texts([doc_id for doc_id, _ in matched])
+
+    results = []
+    for doc_id, score in matched:
+        doc = docs[doc_id]
+        results.append({
+            "id": doc_id,
+            "score": score,
+            "job_id": doc.get("job_id"),
+            "job_title": doc.get("job_title"),
+            "full_name": doc.get("full_name"),
+            "years_exp": doc.get("years_exp"),
+            "status": doc.get("status"),
+            "created_at": doc.get("created_at").isoformat() if doc.get("created_at") else None,
+            "highlights": highlight(texts.get(doc_id, ""), terms),
+        })
+
+    return results
+
+
+# =========================
+# 🔹 Pre-screen ranking (see prescreen.py)
+# =========================
+
+def get_prescreen_candidates(job_id: str) -> List[Dict[str, Any]]:
+    """
+    Small docs for every application of a job, plus any cached prescreen score.
+    resume_text is NOT loaded here.
+    """
+    projection = {
+        "job_id": 1,
+        "job_title": 1,
+        "full_name": 1,
+        "years_exp": 1,
+        "status": 1,
+        "created_at": 1,
+        "prescreen": 1,
+    }
+    return list(applications_collection.find({"job_id": job_id}, projection))
+
+
+def get_resume_texts(application_ids: List[str]) -> Dict[str, str]:
+    """
+    Load (and decompress) resume text for just the given application ids.
+    Text is looked up by file hash (resume_blobs), then per application
+    (resume_texts), then inline on unmigrated documents.
+    """
+    oids = [ObjectId(a) for a in application_ids]
+    texts: Dict[str, str] = {}
+    by_hash: Dict[str, List[str]] = {}
+    unhashed: List[ObjectId] = []
+    inline: Dict[ObjectId, str] = {}
+
+    for d in applications_collection.find({"_id": {"$in": oids}}, {"resume.sha256": 1, "resume_text": 1}):
+        h = (d.get("resume") or {}).get("sha256")
+        if h:
+            by_hash.setdefault(h, []).append(str(d["_id"]))
+        else:
+            unhashed.append(d["_id"])
+            inline[d["_id"]] = d.get("resume_text") or ""
+
+    for h, text in get_cached_resume_texts(list(by_hash)).items():
+        for application_id in by_hash[h]:
+            texts[application_id] = text
+
+    if unhashed:
+        for d in resume_texts_collection.find({"_id": {"$in": unhashed}}):
+            texts[str(d["_id"])] = _decode_resume_text(d)
+        # unmigrated applications still carry resume_text inline
+        for oid, text in inline.items():
+            texts.setdefault(str(oid), text)
+
+    return texts
+
+
+def save_prescreen_scores(job_hash: str, scores: Dict[str, float]) -> None:
+    """
+    Cache prescreen scores on the applications in one bulk_write.
+    job_hash identifies the job description the scores were computed against.
+    """
+    if not scores:
+        return
+
+    now = datetime.utcnow()
+    ops = [
+        UpdateOne(
+            {"_id": ObjectId(application_id)},
+            {"$set": {"prescreen": {"job_hash": job_hash, "score": score, "scored_at": now}}},
+        )
+        for application_id, score in scores.items()
+    ]
+    applications_collection.bulk_write(ops, ordered=False)
+
+
+def migrate_inline_resume_texts(batch_size: int = 500) -> int:
+    """
+    Move legacy inline resume_text fields into resume_texts (compressed)
+    and leave only a preview on the application. Safe to re-run.
+    """
+    moved = 0
+    while True:
+        docs = list(
+            applications_collection.find(
+                {"resume_text": {"$exists": True}},
+                {"resume_text": 1},
+            ).limit(batch_size)
+        )
+        if not docs:
+            return moved
+
+        ops = []
+        for doc in docs:
+            text = doc.get("resume_text") or ""
+            save_resume_text(doc["_id"], text)
+            ops.append(UpdateOne(
+                {"_id": doc["_id"]},
+                {
+                    "$set": {"resume_preview": text[:RESUME_PREVIEW_CHARS]},
+                    "$unset": {"resume_text": ""},
+                },
+            ))
+        applications_collection.bulk_write(ops, ordered=False)
+        moved += len(docs)
+
+
+# =========================
+# 🔹 Hiring-funnel rollups
+# =========================
+#
+# One document (_id "global") in funnel_rollups holds every funnel counter:
+#   applications_total, applications_per_day.<YYYY-MM-DD>,
+#   status_counts.<status>, status_transitions.<from>_to_<to>,
+#   assessment_scores.{count, sum, buckets.<0..10>}
+# Writers bump it with $inc, so reading analytics is a single find_one.
+
+FUNNEL_DOC_ID = "global"
+
+
+def _funnel_key(value: Any) -> str:
+    # statuses come from clients → keep them safe as Mongo field names
+    return str(value).replace(".", "_").replace("$", "_") or "_"
+
+
+def _status_name(status: str | None) -> str:
+    # applications without a status are shown as "Pending" in the UI
+    return _funnel_key(status or "Pending")
+
+
+def _assessment_score(result: Any) -> float | None:
+    """Agent4 scores are 0–10, sometimes as strings; None if there's no usable score."""
+    if not isinstance(result, dict):
+        return None
+    try:
+        return min(max(float(result.get("score")), 0.0), 10.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _bump_funnel(inc: Dict[str, float]) -> None:
+    inc = {k: v for k, v in inc.items() if v}
+    if not inc:
+        return
+    try:
+        funnel_collection.update_one({"_id": FUNNEL_DOC_ID}, {"$inc": inc}, upsert=True)
+    except Exception as e:
+        # analytics must never fail the write they describe; `rebuild` repairs drift
+        print(f"[WARN] Funnel rollup update failed: {e}")
+
+
+def _record_new_applications(docs: List[Dict[str, Any]]) -> None:
+    inc: Dict[str, float] = {"applications_total": len(docs)}
+    for doc in docs:
+        day = f"applications_per_day.{doc['created_at']:%Y-%m-%d}"
+        inc[day] = inc.get(day, 0) + 1
+    inc[f"status_counts.{_status_name(None)}"] = len(docs)
+    _bump_funnel(inc)
+
+
+def _record_status_changes(changes: List[tuple]) -> None:
+    inc: Dict[str, float] = {}
+    for old, new in changes:
+        old, new = _status_name(old), _status_name(new)
+        if old == new:
+            continue
+        for key, delta in (
+            (f"status_counts.{old}", -1),
+            (f"status_counts.{new}", 1),
+            (f"status_transitions.{old}_to_{new}", 1),
+        ):
+            inc[key] = inc.get(key, 0) + delta
+    _bump_funnel(inc)
+
+
+def _record_assessment_score(old_result: Any, new_result: Any) -> None:
+    inc: Dict[str, float] = {}
+    for result, sign in ((old_result, -1), (new_result, 1)):
+        score = _assessment_score(result)
+        if score is None:
+            continue
+        bucket = f"assessment_scores.buckets.{int(score)}"
+        inc["assessment_scores.count"] = inc.get("assessment_scores.count", 0) + sign
+        inc["assessment_scores.sum"] = inc.get("assessment_scores.sum", 0) + sign * score
+        inc[bucket] = inc.get(bucket, 0) + sign
+    _bump_funnel(inc)
+
+
+def get_funnel_metrics() -> Dict[str, Any]:
+    """Current funnel counters (one document read, independent of history size)."""
+    doc = funnel_collection.find_one({"_id": FUNNEL_DOC_ID}) or {}
+    doc.pop("_id", None)
+
+    scores = doc.get("assessment_scores") or {}
+    count = scores.get("count", 0)
+    return {
+        "applications_total": doc.get("applications_total", 0),
+        "applications_per_day": dict(sorted((doc.get("applications_per_day") or {}).items())),
+        "status_counts": doc.get("status_counts") or {},
+        "status_transitions": doc.get("status_transitions") or {},
+        "assessment_scores": {
+            "count": count,
+            "mean": round(scores.get("sum", 0) / count, 2) if count else None,
+            "buckets": {
+                str(b): (scores.get("buckets") or {}).get(str(b), 0) for b in range(11)
+            },
+        },
+    }
+
+
+def rebuild_funnel_metrics(batch_size: int = 1000) -> Dict[str, Any]:
+    """
+    Recompute the funnel counters from job_applications (backfill / drift repair).
+    Past status transitions aren't recorded on the applications, so the existing
+    status_transitions counters are carried over as they are.
+    """
+    per_day: Dict[str, int] = {}
+    status_counts: Dict[str, int] = {}
+    buckets: Dict[str, int] = {}
+    total, score_count, score_sum = 0, 0, 0.0
+
+    cursor = applications_collection.find(
+        {},
+        {"created_at": 1, "status": 1, "assessment_result.score": 1},
+    ).batch_size(batch_size)
+
+    for doc in cursor:
+        total += 1
+        if doc.get("created_at"):
+            day = f"{doc['created_at']:%Y-%m-%d}"
+            per_day[day] = per_day.get(day, 0) + 1
+        status = _status_name(doc.get("status"))
+        status_counts[status] = status_counts.get(status, 0) + 1
+
+        score = _assessment_score(doc.get("assessment_result"))
+        if score is not None:
+            score_count += 1
+            score_sum += score
+            buckets[str(int(score))] = buckets.get(str(int(score)), 0) + 1
+
+    existing = funnel_collection.find_one({"_id": FUNNEL_DOC_ID}, {"status_transitions": 1}) or {}
+    funnel_collection.replace_one(
+        {"_id": FUNNEL_DOC_ID},
+        {
+            "_id": FUNNEL_DOC_ID,
+            "applications_total": total,
+            "applications_per_day": per_day,
+            "status_counts": status_counts,
+            "status_transitions": existing.get("status_transitions") or {},
+            "assessment_scores": {"count": score_count, "sum": score_sum, "buckets": buckets},
+        },
+        upsert=True,
+    )
+    return get_funnel_metrics()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] == ["rebuild-funnel"]:
+        # python mongodb.py rebuild-funnel  → backfill / repair funnel_rollups
+        metrics = rebuild_funnel_metrics()
+        print(f"[INFO] Rebuilt funnel rollups from {metrics['applications_total']} applications.")
+    else:
+        # python mongodb.py  → one-off migration of inline resume_text fields
+        print(f"[INFO] Migrated {migrate_inline_resume_texts()} resume texts to resume_texts.")
@@ -0,0 +1,241 @@
+# output_store.py
+"""
+Shared store for the latest agent outputs.
+
+The orchestrator publishes here; every API worker (any process, any node)
+reads from here, so /outputs no longer depends on in-process state.
+
+Every publish is also appended to a run history (kept AGENT_HISTORY_TTL_DAYS),
+queryable with get_history(); if the latest snapshot of a key is ever missing,
+it is warm-started from that key's newest history entry instead of waiting for
+a cycle.
+
+Agents can also keep private working state here (load_state / save_state),
+e.g. which inputs they have already processed; it is not served by /outputs.
+
+Backends (AGENT_OUTPUT_STORE):
+  - "mongo"  → `agent_outputs` collection in the app database (default when MONGODB_URI is set),
+               history in the `agent_output_history` time-series collection (TTL)
+  - "sqlite" → local file (AGENT_OUTPUT_DB), a stand-in for single-node setups / dev
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+AGENT_OUTPUT_STORE = os.getenv("AGENT_OUTPUT_STORE") or ("mongo" if os.getenv("MONGODB_URI") else "sqlite")
+AGENT_OUTPUT_DB = os.getenv(
+    "AGENT_OUTPUT_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "agent_outputs.db"),
+)
+AGENT_HISTORY_TTL_DAYS = float(os.getenv("AGENT_HISTORY_TTL_DAYS", "30"))
+
+
+class MongoOutputStore:
+    """
+    One document per output key. The output is stored as a JSON string:
+    LLM-produced keys may contain '.' or '$', which Mongo field names can't hold safely.
+    """
+
+    def __init__(self):
+        from mongodb import get_db
+        from pymongo.errors import CollectionInvalid
+
+        db = get_db()
+        self._collection = db["agent_outputs"]
+        self._state = db["agent_state"]
+        try:
+            db.create_collection(
+                "agent_output_history",
+                timeseries={"timeField": "ts", "metaField": "key", "granularity": "minutes"},
+                expireAfterSeconds=int(AGENT_HISTORY_TTL_DAYS * 86400),
+            )
+        except CollectionInvalid:
+            pass   # already exists
+        self._history = db["agent_output_history"]
+        self._history.create_index([("key", 1), ("ts", -1)])
+
+    def publish(self, key: str, output: Any, record_history: bool = True) -> None:
+        payload = json.dumps(output)
+        now = datetime.utcnow()
+        self._collection.replace_one(
+            {"_id": key},
+            {"_id": key, "payload": payload, "updated_at": now},
+            upsert=True,
+        )
+        if record_history:
+            self._history.insert_one({"key": key, "ts": now, "payload": payload})
+
+    def get_history(self, key: str, since: float | None = None, limit: int = 100) -> List[Dict[str, Any]]:
+        query: Dict[str, Any] = {"key": key}
+        if since is None:
+            # newest `limit` entries, returned oldest first
+            docs = list(self._history.find(query, {"ts": 1, "payload": 1}).sort("ts", -1).limit(limit))[::-1]
+        else:
+            query["ts"] = {"$gt": datetime.utcfromtimestamp(since)}
+            docs = self._history.find(query, {"ts": 1, "payload": 1}).sort("ts", 1).limit(limit)
+        return [
+            {"ts": d["ts"].replace(tzinfo=timezone.utc).timestamp(), "output": json.loads(d["payload"])}
+            for d in docs
+        ]
+
+    def latest_from_history(self, skip: Iterable[str] = ()) -> Dict[str, Any]:
+        """Newest history entry of every key not in `skip` (one indexed lookup per key)."""
+        skip = set(skip)
+        latest = {}
+        for key in self._history.distinct("key"):
+            if key in skip:
+                continue
+            doc = self._history.find_one({"key": key}, {"payload": 1}, sort=[("ts", -1)])
+            if doc:
+                latest[key] = json.loads(doc["payload"])
+        return latest
+
+    def get(self, key: str) -> Any | None:
+        doc = self._collection.find_one({"_id": key}, {"payload": 1})
+        return json.loads(doc["payload"]) if doc else None
+
+    def get_all(self) -> Dict[str, Any]:
+        return {d["_id"]: json.loads(d["payload"]) for d in self._collection.find({}, {"payload": 1})}
+
+    def save_state(self, agent: str, state: Any) -> None:
+        self._state.replace_one(
+            {"_id": agent},
+            {"_id": agent, "payload": json.dumps(state), "updated_at": datetime.utcnow()},
+            upsert=True,
+        )
+
+    def load_state(self, agent: str) -> Any | None:
+        doc = self._state.find_one({"_id": agent}, {"payload": 1})
+        return json.loads(doc["payload"]) if doc else None
+
+
+class SqliteOutputStore:
+    """Same interface backed by a local SQLite file (WAL, so readers don't block the writer)."""
+
+    def __init__(self, path: str = AGENT_OUTPUT_DB):
+        self._path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS agent_outputs ("
+                " key TEXT PRIMARY KEY, payload TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS agent_output_history ("
+                " key TEXT NOT NULL, ts REAL NOT NULL, payload TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS agent_output_history_key_ts ON agent_output_history (key, ts)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS agent_state ("
+                " agent TEXT PRIMARY KEY, payload TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self._path, timeout=10)
+
+    def publish(self, key: str, output: Any, record_history: bool = True) -> None:
+        payload = json.dumps(output)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO agent_outputs (key, payload, updated_at) VALUES (?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET payload = excluded.payload, updated_at = excluded.updated_at",
+                (key, payload, now),
+            )
+            if record_history:
+                conn.execute(
+                    "INSERT INTO agent_output_history (key, ts, payload) VALUES (?, ?, ?)",
+                    (key, now, payload),
+                )
+                # TTL: prune this key's expired entries (uses the (key, ts) index)
+                conn.execute(
+                    "DELETE FROM agent_output_history WHERE key = ? AND ts < ?",
+                    (key, now - AGENT_HISTORY_TTL_DAYS * 86400),
+                )
+
+    def get_history(self, key: str, since: float | None = None, limit: int = 100) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            if since is None:
+                # newest `limit` entries, returned oldest first
+                rows = conn.execute(
+                    "SELECT ts, payload FROM agent_output_history WHERE key = ? ORDER BY ts DESC LIMIT ?",
+                    (key, limit),
+                ).fetchall()[::-1]
+            else:
+                rows = conn.execute(
+                    "SELECT ts, payload FROM agent_output_history WHERE key = ? AND ts > ? ORDER BY ts LIMIT ?",
+                    (key, since, limit),
+                ).fetchall()
+        return [{"ts": ts, "output": json.loads(payload)} for ts, payload in rows]
+
+    def latest_from_history(self, skip: Iterable[str] = ()) -> Dict[str, Any]:
+        """Newest history entry of every key not in `skip` (one indexed lookup per key)."""
+        skip = set(skip)
+        latest = {}
+        with self._connect() as conn:
+            keys = [k for (k,) in conn.execute("SELECT DISTINCT key FROM agent_output_history") if k not in skip]
+            for key in keys:
+                row = conn.execute(
+                    "SELECT payload FROM agent_output_history WHERE key = ? ORDER BY ts DESC LIMIT 1", (key,)
+                ).fetchone()
+                if row:
+                    latest[key] = json.loads(row[0])
+        return latest
+
+    def get(self, key: str) -> Any | None:
+        with self._connect() as conn:
+            row = conn.execute("SELECT payload FROM agent_outputs WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_all(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT key, payload FROM agent_outputs ORDER BY key").fetchall()
+        return {key: json.loads(payload) for key, payload in rows}
+
+    def save_state(self, agent: str, state: Any) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO agent_state (agent, payload, updated_at) VALUES (?, ?, ?)"
+                " ON CONFLICT(agent) DO UPDATE SET payload = excluded.payload, updated_at = excluded.updated_at",
+                (agent, json.dumps(state), time.time()),
+            )
+
+    def load_state(self, agent: str) -> Any | None:
+        with self._connect() as conn:
+            row = conn.execute("SELECT payload FROM agent_state WHERE agent = ?", (agent,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Process-wide store instance, created on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = MongoOutputStore() if AGENT_OUTPUT_STORE == "mongo" else SqliteOutputStore()
+                _warm_start(store)
+                _store = store
+    return _store
+
+
+def _warm_start(store) -> None:
+    """Restore any missing latest outputs from history, so /outputs never waits for a cycle."""
+    try:
+        current = store.get_all()
+        for key, output in store.latest_from_history(skip=current).items():
+            store.publish(key, output, record_history=False)
+            print(f"[INFO] Warm-started {key} from run history.")
+    except Exception as e:
+        print(f"[WARN] Warm start from history failed: {e}")
@@ -0,0 +1,68 @@
+# prescreen.py
+"""
+Cheap local pre-screen: cosine similarity between each resume and the job description.
+
+Text is turned into hashed unigram + bigram vectors (sublinear tf, no corpus idf),
+so an application's score depends only on its resume and the job description and
+can be cached until the description changes.
+"""
+import hashlib
+import math
+import zlib
+from collections import Counter
+from typing import Dict, List
+
+import numpy as np
+
+from search_index import tokenize
+
+# bump when the featurization changes so cached scores get recomputed
+FEATURE_VERSION = "hash-ngram-v1"
+N_FEATURES = 1 << 20
+
+
+def job_fingerprint(job_description: str) -> str:
+    """Cache key for scores computed against this job description."""
+    payload = f"{FEATURE_VERSION}\n{job_description or ''}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def featurize(text: str) -> Dict[int, float]:
+    """Hashed unigram + bigram features with 1 + log(tf) weights."""
+    tokens = tokenize(text)
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    counts: Counter = Counter(zlib.crc32(g.encode("utf-8")) & (N_FEATURES - 1) for g in grams)
+    return {feature: 1.0 + math.log(tf) for feature, tf in counts.items()}
+
+
+def score_resumes(job_description: str, resume_texts: List[str]) -> np.ndarray:
+    """
+    Cosine similarity of every resume against the job description.
+
+    Only the job description's features can contribute to a dot product, so resumes
+    are projected onto those columns (n x k) and scored with one mat-vec; each
+    resume's norm is still taken over its full feature vector.
+    """
+    job_vec = featurize(job_description)
+    if not job_vec or not resume_texts:
+        return np.zeros(len(resume_texts), dtype=np.float32)
+
+    columns = {feature: j for j, feature in enumerate(job_vec)}
+    q = np.fromiter(job_vec.values(), dtype=np.float32, count=len(job_vec))
+    q /= np.linalg.norm(q)
+
+    matrix = np.zeros((len(resume_texts), len(columns)), dtype=np.float32)
+    norms = np.ones(len(resume_texts), dtype=np.float32)
+
+    for i, text in enumerate(resume_texts):
+        vec = featurize(text)
+        if not vec:
+            continue
+        norms[i] = math.sqrt(sum(w * w for w in vec.values()))
+        for feature, weight in vec.items():
+            j = columns.get(feature)
+            if j is not None:
+                matrix[i, j] = weight
+
+    return (matrix @ q) / norms
@@ -0,0 +1,230 @@
+# profiler.py
+"""
+Opt-in sampling profiler for one API request or one orchestrator cycle.
+
+Requests: set PROFILE_TOKEN, then send `X-Profile: <token>` (or `?profile=<token>`).
+The response carries `X-Profile-File` naming the output written to PROFILE_DIR.
+Without PROFILE_TOKEN the middleware is not installed at all.
+
+Agent cycles: start the orchestrator with PROFILE_NEXT_CYCLE=1, or create
+PROFILE_DIR/profile_next_cycle (POST /profile/agents/next-cycle does this).
+The next cycle is profiled and the flag file is removed.
+
+Output format (PROFILE_FORMAT):
+  - "collapsed"  → <name>.folded, one "thread;frame;...;frame count" line per stack
+                   (flamegraph.pl, speedscope, inferno)
+  - "speedscope" → <name>.speedscope.json, one sampled profile per thread
+A background thread samples every thread's stack each PROFILE_INTERVAL_MS.
+Only one profile runs at a time; an overlapping request is just served normally.
+"""
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_DIR = os.getenv(
+    "PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles"),
+)
+PROFILE_FORMAT = os.getenv("PROFILE_FORMAT", "collapsed")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+NEXT_CYCLE_FLAG = "profile_next_cycle"
+
+_active = threading.Lock()
+_next_cycle_from_env = os.getenv("PROFILE_NEXT_CYCLE") == "1"
+
+Stack = Tuple[str, ...]
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples sys._current_frames() from a daemon thread until stop()."""
+
+    def __init__(self, interval_sec: float = PROFILE_INTERVAL_MS / 1000):
+        self.interval_sec = interval_sec
+        self.samples: Counter = Counter()   # (thread name, root→leaf stack) → count
+        self.duration_sec = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.duration_sec = time.perf_counter() - self._started
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval_sec):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack: List[str] = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                self.samples[(names.get(ident, str(ident)), tuple(reversed(stack)))] += 1
+
+
+def _write_collapsed(path: str, prof: SamplingProfiler) -> None:
+    with open(path, "w") as f:
+        for (thread, stack), count in prof.samples.most_common():
+            f.write(";".join((thread,) + stack) + f" {count}\n")
+
+
+def _write_speedscope(path: str, name: str, prof: SamplingProfiler) -> None:
+    frames: List[Dict[str, str]] = []
+    frame_index: Dict[str, int] = {}
+    per_thread: Dict[str, Dict[str, list]] = {}
+    weight = prof.interval_sec * 1000
+
+    for (thread, stack), count in prof.samples.items():
+        indices = []
+        for label in stack:
+            if label not in frame_index:
+                frame_index[label] = len(frames)
+                frames.append({"name": label})
+            indices.append(frame_index[label])
+        p = per_thread.setdefault(thread, {"samples": [], "weights": []})
+        p["samples"].append(indices)
+        p["weights"].append(count * weight)
+
+    doc = {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "profiler.py",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": thread,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(p["weights"]),
+                "samples": p["samples"],
+                "weights": p["weights"],
+            }
+            for thread, p in per_thread.items()
+        ],
+    }
+    with open(path, "w") as f:
+        json.dump(doc, f)
+
+
+def output_path(name: str) -> str:
+    ext = ".speedscope.json" if PROFILE_FORMAT == "speedscope" else ".folded"
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in name).strip("_")
+    return os.path.join(PROFILE_DIR, f"{stamp}-{safe}-{os.getpid()}{ext}")
+
+
+@contextmanager
+def profile(name: str, path: str | None = None):
+    """
+    Profile the enclosed block and write it to `path` (default: output_path(name)).
+    Yields the path, or None if another profile is already running.
+    """
+    if not _active.acquire(blocking=False):
+        yield None
+        return
+    path = path or output_path(name)
+    prof = SamplingProfiler()
+    prof.start()
+    try:
+        yield path
+    finally:
+        prof.stop()
+        _active.release()
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            if PROFILE_FORMAT == "speedscope":
+                _write_speedscope(path, name, prof)
+            else:
+                _write_collapsed(path, prof)
+            print(f"[INFO] Profile ({sum(prof.samples.values())} samples, {prof.duration_sec:.1f}s) → {path}")
+        except OSError as e:
+            print(f"[WARN] Could not write profile {path}: {e}")
+
+
+# =========================
+# 🔹 Orchestrator cycles
+# =========================
+
+def request_next_cycle() -> str:
+    """Ask the orchestrator (same host) to profile its next cycle."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    flag = os.path.join(PROFILE_DIR, NEXT_CYCLE_FLAG)
+    with open(flag, "w") as f:
+        f.write(str(time.time()))
+    return flag
+
+
+def cycle_profile(cycle: int):
+    """Context manager for one agent cycle: profiles it if requested, else a no-op."""
+    global _next_cycle_from_env
+    flag = os.path.join(PROFILE_DIR, NEXT_CYCLE_FLAG)
+    requested = _next_cycle_from_env or os.path.exists(flag)
+    if not requested:
+        return nullcontext()
+
+    _next_cycle_from_env = False
+    try:
+        os.remove(flag)
+    except FileNotFoundError:
+        pass
+    return profile(f"agents-cycle{cycle}")
+
+
+# =========================
+# 🔹 Requests
+# =========================
+
+def is_authorized(token: str | None) -> bool:
+    return bool(PROFILE_TOKEN) and token is not None and hmac.compare_digest(token, PROFILE_TOKEN)
+
+
+def _request_token(scope) -> str | None:
+    for name, value in scope.get("headers", []):
+        if name == b"x-profile":
+            return value.decode("latin-1")
+    query = scope.get("query_string", b"")
+    if b"profile=" in query:
+        return parse_qs(query.decode("latin-1")).get("profile", [None])[0]
+    return None
+
+
+class ProfileMiddleware:
+    """Pure ASGI middleware; only added to the app when PROFILE_TOKEN is set."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not is_authorized(_request_token(scope)):
+            await self.app(scope, receive, send)
+            return
+
+        name = f"{scope['method']}-{scope['path'].strip('/').replace('/', '_') or 'root'}"
+        with profile(name) as path:
+            async def send_with_path(message):
+                if message["type"] == "http.response.start" and path:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-profile-file", os.path.basename(path).encode("latin-1")))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_path)
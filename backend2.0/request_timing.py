@@ -0,0 +1,179 @@
+# request_timing.py
+"""
+Lightweight span timing for requests and background tasks.
+
+    with span("github"):
+        ...
+
+Spans are collected only while a collector is active: the ASGI middleware
+starts one for a sampled fraction of requests (TIMING_SAMPLE_RATE, or any
+request sent with `X-Debug-Timing: 1`); task_worker starts one per task.
+Outside a collector span() does nothing but a ContextVar lookup.
+
+Sampled responses get a `Server-Timing` header with the per-span totals;
+every response gets at least `total`. Requests / tasks slower than
+SLOW_REQUEST_MS are appended to SLOW_REQUEST_LOG as JSON lines by a background
+writer thread, so the event loop never waits on file I/O.
+"""
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Tuple
+
+TIMING_SAMPLE_RATE = float(os.getenv("TIMING_SAMPLE_RATE", "0.1"))
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "2000"))
+SLOW_REQUEST_LOG = os.getenv(
+    "SLOW_REQUEST_LOG",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "slow_requests.jsonl"),
+)
+
+_spans: ContextVar[List[Tuple[str, float]] | None] = ContextVar("timing_spans", default=None)
+_log_queue: "queue.Queue[str | None]" = queue.Queue(maxsize=1000)
+_log_lock = threading.Lock()
+_log_writer: threading.Thread | None = None
+
+
+@contextmanager
+def span(name: str):
+    """Time the block under `name` (a Server-Timing token: no spaces)."""
+    spans = _spans.get()
+    if spans is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans.append((name, (time.perf_counter() - start) * 1000))
+
+
+@contextmanager
+def collect():
+    """Collect spans for the enclosed work; yields the (growing) span list."""
+    spans: List[Tuple[str, float]] = []
+    token = _spans.set(spans)
+    try:
+        yield spans
+    finally:
+        _spans.reset(token)
+
+
+def summarize(spans: List[Tuple[str, float]]) -> Dict[str, Dict[str, float]]:
+    """Per-name totals: {"github": {"ms": 812.4, "count": 2}, ...}."""
+    out: Dict[str, Dict[str, float]] = {}
+    for name, ms in spans:
+        s = out.setdefault(name, {"ms": 0.0, "count": 0})
+        s["ms"] += ms
+        s["count"] += 1
+    return {name: {"ms": round(s["ms"], 1), "count": s["count"]} for name, s in out.items()}
+
+
+def server_timing_header(spans: List[Tuple[str, float]] | None, total_ms: float) -> str:
+    parts = []
+    for name, s in summarize(spans or []).items():
+        desc = f';desc="x{s["count"]}"' if s["count"] > 1 else ""
+        parts.append(f"{name};dur={s['ms']}{desc}")
+    parts.append(f"total;dur={round(total_ms, 1)}")
+    return ", ".join(parts)
+
+
+def log_if_slow(kind: str, name: str, total_ms: float, spans: List[Tuple[str, float]] | None, **extra: Any) -> None:
+    if total_ms < SLOW_REQUEST_MS:
+        return
+    entry = {
+        "ts": time.time(),
+        "kind": kind,
+        "name": name,
+        "total_ms": round(total_ms, 1),
+        "sampled": spans is not None,
+        "spans": summarize(spans) if spans is not None else None,
+        **extra,
+    }
+    _start_log_writer()
+    try:
+        _log_queue.put_nowait(json.dumps(entry, default=str))
+    except queue.Full:
+        print("[WARN] Slow-request log backlog full, dropping entry.")
+
+
+def _start_log_writer() -> None:
+    global _log_writer
+    if _log_writer is None:
+        with _log_lock:
+            if _log_writer is None:
+                _log_writer = threading.Thread(target=_write_log, name="slow-request-log", daemon=True)
+                _log_writer.start()
+                atexit.register(_stop_log_writer)
+
+
+def _write_log() -> None:
+    while True:
+        lines = [_log_queue.get()]
+        while True:   # write whatever else is queued in the same append
+            try:
+                lines.append(_log_queue.get_nowait())
+            except queue.Empty:
+                break
+        stop = None in lines
+        lines = [line for line in lines if line is not None]
+        if lines:
+            try:
+                with open(SLOW_REQUEST_LOG, "a") as f:
+                    f.write("\n".join(lines) + "\n")
+            except OSError as e:
+                print(f"[WARN] Could not write slow-request log: {e}")
+        if stop:
+            return
+
+
+def _stop_log_writer() -> None:
+    # flush what is still queued on interpreter exit
+    _log_queue.put(None)
+    _log_writer.join(timeout=5)
+
+
+class TimingMiddleware:
+    """Pure ASGI middleware (no BaseHTTPMiddleware buffering)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        forced = (b"x-debug-timing", b"1") in scope.get("headers", [])
+        sampled = forced or random.random() < TIMING_SAMPLE_RATE
+        start = time.perf_counter()
+        status = {"code": None}
+        spans: List[Tuple[str, float]] | None = [] if sampled else None
+        token = _spans.set(spans)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                total_ms = (time.perf_counter() - start) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing_header(spans, total_ms).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _spans.reset(token)
+            total_ms = (time.perf_counter() - start) * 1000
+            log_if_slow(
+                "request",
+                f"{scope['method']} {scope['path']}",
+                total_ms,
+                spans,
+                status=status["code"],
+            )
@@ -0,0 +1,185 @@
+# search_index.py
+"""
+In-process inverted index with BM25 ranking over resume text.
+
+Postings are compact arrays (doc index + term frequency), so 100k resumes
+stay in a few hundred MB and a query only touches the postings of its terms.
+The index holds small filter metadata (job_id, status, years_exp) but not
+the resume text itself; callers fetch text only for the top hits.
+"""
+import heapq
+import math
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in",
+    "is", "it", "of", "on", "or", "the", "to", "with", "was", "were", "will",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens; keeps tech terms like c++ / c# intact."""
+    if not text:
+        return []
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def highlight(text: str, terms: List[str], max_snippets: int = 3, window: int = 60) -> List[str]:
+    """
+    Short snippets around the first matches of `terms`, with matches wrapped in <mark>.
+    """
+    if not text or not terms:
+        return []
+
+    pattern = re.compile(
+        r"(?<![a-z0-9])(" + "|".join(re.escape(t) for t in sorted(set(terms), key=len, reverse=True)) + r")(?![a-z0-9+#])",
+        re.IGNORECASE,
+    )
+
+    snippets = []
+    last_end = -1
+    for match in pattern.finditer(text):
+        if match.start() < last_end:
+            continue
+        start = max(0, match.start() - window)
+        end = min(len(text), match.end() + window)
+        snippet = pattern.sub(r"<mark>\1</mark>", text[start:end])
+        snippet = " ".join(snippet.split())
+        snippets.append(("…" if start > 0 else "") + snippet + ("…" if end < len(text) else ""))
+        last_end = end
+        if len(snippets) >= max_snippets:
+            break
+    return snippets
+
+
+class ResumeIndex:
+    """
+    BM25 index keyed by application id.
+    add() is idempotent: re-adding an id only refreshes its metadata.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+
+        self._ids: List[str] = []
+        self._id_to_idx: Dict[str, int] = {}
+        self._doc_len = array("I")
+        self._total_len = 0
+
+        # filter metadata, parallel to _ids
+        self._job_ids: List[str | None] = []
+        self._statuses: List[str] = []
+        self._years = array("i")
+
+        # term -> (doc indexes, term frequencies)
+        self._postings: Dict[str, Tuple[array, array]] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._id_to_idx
+
+    def add(
+        self,
+        doc_id: str,
+        text: str,
+        job_id: str | None = None,
+        status: str | None = None,
+        years_exp: int | None = None,
+    ) -> None:
+        with self._lock:
+            if doc_id in self._id_to_idx:
+                idx = self._id_to_idx[doc_id]
+                self._job_ids[idx] = job_id
+                self._statuses[idx] = status or "Pending"
+                self._years[idx] = _as_int(years_exp)
+                return
+
+            idx = len(self._ids)
+            self._ids.append(doc_id)
+            self._id_to_idx[doc_id] = idx
+            self._job_ids.append(job_id)
+            self._statuses.append(status or "Pending")
+            self._years.append(_as_int(years_exp))
+
+            counts = Counter(tokenize(text))
+            length = sum(counts.values())
+            self._doc_len.append(length)
+            self._total_len += length
+
+            for term, tf in counts.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = (array("I"), array("H"))
+                    self._postings[term] = postings
+                postings[0].append(idx)
+                postings[1].append(min(tf, 65535))
+
+    def set_status(self, doc_id: str, status: str) -> None:
+        with self._lock:
+            idx = self._id_to_idx.get(doc_id)
+            if idx is not None:
+                self._statuses[idx] = status or "Pending"
+
+    def search(
+        self,
+        query: str,
+        job_id: str | None = None,
+        status: str | None = None,
+        min_years: int | None = None,
+        limit: int = 20,
+    ) -> List[Tuple[str, float]]:
+        """Return up to `limit` (doc_id, score) pairs, best first."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        with self._lock:
+            n_docs = len(self._ids)
+            if not n_docs:
+                return []
+            avg_len = self._total_len / n_docs
+            k1, b = self.k1, self.b
+
+            scores: Dict[int, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                doc_idxs, tfs = postings
+                df = len(doc_idxs)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for idx, tf in zip(doc_idxs, tfs):
+                    norm = tf + k1 * (1 - b + b * self._doc_len[idx] / avg_len)
+                    scores[idx] = scores.get(idx, 0.0) + idf * tf * (k1 + 1) / norm
+
+            def keep(idx: int) -> bool:
+                if job_id is not None and self._job_ids[idx] != job_id:
+                    return False
+                if status is not None and self._statuses[idx] != status:
+                    return False
+                if min_years is not None and self._years[idx] < min_years:
+                    return False
+                return True
+
+            best = heapq.nlargest(
+                limit,
+                ((score, idx) for idx, score in scores.items() if keep(idx)),
+            )
+            return [(self._ids[idx], round(score, 4)) for score, idx in best]
+
+
+def _as_int(value: Any) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return -1
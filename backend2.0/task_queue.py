@@ -0,0 +1,292 @@
+# task_queue.py
+"""
+Durable background task queue (used for assessment generation / evaluation).
+
+- enqueue() is idempotent per idempotency_key: the same key returns the same task
+  (a task that ended up "failed" is re-queued instead).
+- claim() hands a task to one worker and hides it for TASK_VISIBILITY_SEC; the
+  worker extend()s that while the handler runs, so only a dead worker's task
+  becomes claimable again (TASK_VISIBILITY_SEC after its last heartbeat).
+- fail() either schedules a retry (exponential backoff + jitter) or marks it failed.
+- backlog() counts queued + running tasks (admission control sheds load on it).
+
+Backend follows output_store: Mongo `tasks` collection, or a local SQLite file.
+"""
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict
+
+from output_store import AGENT_OUTPUT_DB, AGENT_OUTPUT_STORE
+
+TASK_VISIBILITY_SEC = float(os.getenv("TASK_VISIBILITY_SEC", "180"))
+TASK_MAX_ATTEMPTS = int(os.getenv("TASK_MAX_ATTEMPTS", "3"))
+BACKOFF_BASE_SEC = 2.0
+BACKOFF_MAX_SEC = 60.0
+
+
+def backoff_delay(attempts: int) -> float:
+    """Exponential backoff with ±50% jitter."""
+    delay = min(BACKOFF_MAX_SEC, BACKOFF_BASE_SEC * 2 ** max(attempts - 1, 0))
+    return delay * random.uniform(0.5, 1.5)
+
+
+def _new_task(kind: str, payload: Dict[str, Any], idempotency_key: str | None, max_attempts: int) -> Dict[str, Any]:
+    now = time.time()
+    return {
+        "id": uuid.uuid4().hex,
+        "kind": kind,
+        "payload": payload,
+        "idempotency_key": idempotency_key,
+        "status": "queued",
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "run_after": now,
+        "locked_until": 0,
+        "worker": None,
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+class MongoTaskQueue:
+    def __init__(self):
+        from mongodb import get_db
+        self._collection = get_db()["tasks"]
+        self._collection.create_index(
+            "idempotency_key",
+            unique=True,
+            partialFilterExpression={"idempotency_key": {"$type": "string"}},
+        )
+        self._collection.create_index([("status", 1), ("run_after", 1)])
+
+    @staticmethod
+    def _out(doc: Dict[str, Any] | None) -> Dict[str, Any] | None:
+        if not doc:
+            return None
+        doc = dict(doc)
+        doc["id"] = doc.pop("_id")
+        return doc
+
+    def enqueue(self, kind, payload, idempotency_key=None, max_attempts=TASK_MAX_ATTEMPTS):
+        from pymongo import ReturnDocument
+        from pymongo.errors import DuplicateKeyError
+
+        task = _new_task(kind, payload, idempotency_key, max_attempts)
+        task["_id"] = task.pop("id")
+
+        if idempotency_key is None:
+            self._collection.insert_one(task)
+            return self._out(task)
+
+        try:
+            doc = self._collection.find_one_and_update(
+                {"idempotency_key": idempotency_key},
+                {"$setOnInsert": task},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # lost an upsert race → the other caller's task is the one
+            doc = self._collection.find_one({"idempotency_key": idempotency_key})
+
+        if doc["status"] == "failed":
+            doc = self._collection.find_one_and_update(
+                {"_id": doc["_id"], "status": "failed"},
+                {"$set": {"status": "queued", "attempts": 0, "run_after": time.time(), "error": None}},
+                return_document=ReturnDocument.AFTER,
+            ) or doc
+        return self._out(doc)
+
+    def claim(self, worker_id):
+        from pymongo import ReturnDocument
+
+        now = time.time()
+        doc = self._collection.find_one_and_update(
+            {"$or": [
+                {"status": "queued", "run_after": {"$lte": now}},
+                {"status": "running", "locked_until": {"$lt": now}},   # visibility timeout expired
+            ]},
+            {
+                "$set": {"status": "running", "locked_until": now + TASK_VISIBILITY_SEC, "worker": worker_id, "updated_at": now},
+                "$inc": {"attempts": 1},
+            },
+            sort=[("run_after", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        return self._out(doc)
+
+    def extend(self, task_id, worker_id):
+        now = time.time()
+        result = self._collection.update_one(
+            {"_id": task_id, "worker": worker_id, "status": "running"},
+            {"$set": {"locked_until": now + TASK_VISIBILITY_SEC, "updated_at": now}},
+        )
+        return result.matched_count == 1
+
+    def complete(self, task_id, worker_id, result):
+        self._collection.update_one(
+            {"_id": task_id, "worker": worker_id, "status": "running"},
+            {"$set": {"status": "succeeded", "result": result, "error": None, "updated_at": time.time()}},
+        )
+
+    def fail(self, task_id, worker_id, error, retry_at=None):
+        update = {"error": error, "updated_at": time.time()}
+        if retry_at is None:
+            update["status"] = "failed"
+        else:
+            update.update(status="queued", run_after=retry_at)
+        self._collection.update_one({"_id": task_id, "worker": worker_id, "status": "running"}, {"$set": update})
+
+    def get(self, task_id):
+        return self._out(self._collection.find_one({"_id": task_id}))
+
+    def backlog(self):
+        return self._collection.count_documents({"status": {"$in": ["queued", "running"]}})
+
+
+class SqliteTaskQueue:
+    """Single-node stand-in with the same semantics (BEGIN IMMEDIATE serializes claims)."""
+
+    COLUMNS = (
+        "id", "kind", "payload", "idempotency_key", "status", "attempts", "max_attempts",
+        "run_after", "locked_until", "worker", "result", "error", "created_at", "updated_at",
+    )
+
+    def __init__(self, path: str = AGENT_OUTPUT_DB):
+        self._path = path
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                " id TEXT PRIMARY KEY, kind TEXT, payload TEXT, idempotency_key TEXT UNIQUE,"
+                " status TEXT, attempts INTEGER, max_attempts INTEGER, run_after REAL,"
+                " locked_until REAL, worker TEXT, result TEXT, error TEXT, created_at REAL, updated_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS tasks_status_run_after ON tasks (status, run_after)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self._path, timeout=10, isolation_level=None)
+
+    def _row(self, row) -> Dict[str, Any] | None:
+        if not row:
+            return None
+        task = dict(zip(self.COLUMNS, row))
+        task["payload"] = json.loads(task["payload"])
+        task["result"] = json.loads(task["result"]) if task["result"] is not None else None
+        return task
+
+    def _select(self, conn, where: str, args: tuple):
+        return conn.execute(f"SELECT {', '.join(self.COLUMNS)} FROM tasks WHERE {where}", args).fetchone()
+
+    def enqueue(self, kind, payload, idempotency_key=None, max_attempts=TASK_MAX_ATTEMPTS):
+        task = _new_task(kind, payload, idempotency_key, max_attempts)
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if idempotency_key is not None:
+                existing = self._row(self._select(conn, "idempotency_key = ?", (idempotency_key,)))
+                if existing:
+                    if existing["status"] == "failed":
+                        conn.execute(
+                            "UPDATE tasks SET status = 'queued', attempts = 0, run_after = ?, error = NULL WHERE id = ?",
+                            (time.time(), existing["id"]),
+                        )
+                        existing = self._row(self._select(conn, "id = ?", (existing["id"],)))
+                    conn.execute("COMMIT")
+                    return existing
+
+            values = dict(task, payload=json.dumps(payload), result=None)
+            conn.execute(
+                f"INSERT INTO tasks ({', '.join(self.COLUMNS)}) VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                tuple(values[c] for c in self.COLUMNS),
+            )
+            conn.execute("COMMIT")
+            return task
+        finally:
+            conn.close()
+
+    def claim(self, worker_id):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = self._select(
+                conn,
+                "(status = 'queued' AND run_after <= ?) OR (status = 'running' AND locked_until < ?)"
+                " ORDER BY run_after LIMIT 1",
+                (now, now),
+            )
+            if not row:
+                conn.execute("COMMIT")
+                return None
+            task_id = row[0]
+            conn.execute(
+                "UPDATE tasks SET status = 'running', locked_until = ?, worker = ?, attempts = attempts + 1,"
+                " updated_at = ? WHERE id = ?",
+                (now + TASK_VISIBILITY_SEC, worker_id, now, task_id),
+            )
+            task = self._row(self._select(conn, "id = ?", (task_id,)))
+            conn.execute("COMMIT")
+            return task
+        finally:
+            conn.close()
+
+    def extend(self, task_id, worker_id):
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET locked_until = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (now + TASK_VISIBILITY_SEC, now, task_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, task_id, worker_id, result):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE tasks SET status = 'succeeded', result = ?, error = NULL, updated_at = ?"
+                " WHERE id = ? AND worker = ? AND status = 'running'",
+                (json.dumps(result), time.time(), task_id, worker_id),
+            )
+
+    def fail(self, task_id, worker_id, error, retry_at=None):
+        with self._connect() as conn:
+            if retry_at is None:
+                conn.execute(
+                    "UPDATE tasks SET status = 'failed', error = ?, updated_at = ?"
+                    " WHERE id = ? AND worker = ? AND status = 'running'",
+                    (error, time.time(), task_id, worker_id),
+                )
+            else:
+                conn.execute(
+                    "UPDATE tasks SET status = 'queued', error = ?, run_after = ?, updated_at = ?"
+                    " WHERE id = ? AND worker = ? AND status = 'running'",
+                    (error, retry_at, time.time(), task_id, worker_id),
+                )
+
+    def get(self, task_id):
+        with self._connect() as conn:
+            return self._row(self._select(conn, "id = ?", (task_id,)))
+
+    def backlog(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM tasks WHERE status IN ('queued', 'running')").fetchone()[0]
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    """Process-wide queue instance, created on first use."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = MongoTaskQueue() if AGENT_OUTPUT_STORE == "mongo" else SqliteTaskQueue()
+    return _queue
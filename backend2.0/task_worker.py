@@ -0,0 +1,222 @@
+# task_worker.py
+"""
+Worker processes for the background task queue (task_queue.py).
+
+    python task_worker.py            # TASK_WORKERS processes (default 2)
+
+Apiserver enqueues assessment work and returns 202 immediately; these workers
+run the Agent4 LLM calls and store the result on the task (and the application).
+"""
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from multiprocessing import Process, freeze_support
+
+from fastapi import HTTPException
+
+import llm_gateway
+from Agent4 import generate_assessment, evaluate_responses
+from github_store import fetch_job_description
+from mongodb import get_application_by_id, load_resume_text, save_assessment_for_application
+from request_timing import collect, log_if_slow, span
+from task_queue import TASK_VISIBILITY_SEC, backoff_delay, get_queue
+
+TASK_WORKERS = int(os.getenv("TASK_WORKERS", "2"))
+POLL_INTERVAL_SEC = 1.0
+# extend the claim this often while a handler runs (well inside the visibility timeout)
+HEARTBEAT_SEC = TASK_VISIBILITY_SEC / 3
+
+
+def start_assessment_task(application_id: str) -> dict:
+    """
+    Generate assessment questions for this application using Agent4.
+
+    - Reads application from Mongo (job_id, full_name, years_exp) + its resume text
+    - Fetches job description from GitHub (jobs.json)
+    - Builds combined applicant_cv text
+    - Calls Agent4.generate_assessment(...)
+    - Saves questions on this application
+    - Returns questions for the frontend to render
+    """
+    with span("mongo_read"):
+        app_doc = get_application_by_id(application_id)
+    if not app_doc:
+        raise HTTPException(status_code=404, detail="Application not found")
+
+    job_id = app_doc.get("job_id")
+    job_title = app_doc.get("job_title", "")
+    full_name = app_doc.get("full_name", "")
+    phone = app_doc.get("phone", "")
+    years_exp = app_doc.get("years_exp", "")
+
+    if not job_id:
+        raise HTTPException(status_code=400, detail="Application has no job_id")
+
+    # full resume text is stored separately (compressed) → load only here
+    with span("mongo_read"):
+        resume_text = load_resume_text(application_id) or ""
+
+    # 1️⃣ Get job description from GitHub
+    job_description = fetch_job_description(job_id)
+
+    # 2️⃣ Build combined applicant_cv text for Agent4
+    profile_lines = [
+        f"Job ID: {job_id}",
+        f"Job Title: {job_title}",
+        f"Candidate Name: {full_name}",
+        f"Phone: {phone}",
+        f"Years of Experience: {years_exp}",
+        "",
+        "Resume Content:",
+        resume_text,
+    ]
+    applicant_cv_text = "\n".join(line for line in profile_lines if line)
+
+    # 3️⃣ Ask Agent4 to generate questions (returns a dict)
+    questions = generate_assessment(
+        job_description=job_description,
+        applicant_cv=applicant_cv_text,
+    )
+
+    # 4️⃣ Save them in Mongo on this application
+    with span("mongo_write"):
+        save_assessment_for_application(
+            application_id=application_id,
+            questions=questions,
+        )
+
+    # 5️⃣ Result for the frontend
+    return {
+        "application_id": application_id,
+        "questions": questions,
+    }
+
+
+def submit_assessment_task(application_id: str, answers: list) -> dict:
+    """
+    Evaluate candidate answers using Agent4,
+    and save answers + result into the same application document.
+    """
+    with span("mongo_read"):
+        app_doc = get_application_by_id(application_id)
+    if not app_doc:
+        raise HTTPException(status_code=404, detail="Application not found")
+
+    questions = app_doc.get("assessment_questions")
+    if not questions:
+        raise HTTPException(
+            status_code=400,
+            detail="No assessment questions found for this application",
+        )
+
+    # 1️⃣ Call Agent4 to evaluate (stored questions are passed as-is)
+    result = evaluate_responses(
+        questions_with_answers=questions,
+        user_responses=answers,
+    )
+
+    # 2️⃣ Save answers + result
+    with span("mongo_write"):
+        save_assessment_for_application(
+            application_id=application_id,
+            questions=questions,
+            answers=answers,
+            result=result,
+        )
+
+    # 3️⃣ Result for the frontend
+    return {
+        "application_id": application_id,
+        "result": result,
+    }
+
+
+# task kind → handler(**payload)
+HANDLERS = {
+    "assessment.start": start_assessment_task,
+    "assessment.submit": submit_assessment_task,
+}
+
+
+@contextmanager
+def _keep_claimed(queue, task_id: str, worker_id: str):
+    """Heartbeat the task's visibility timeout until the block exits, so a slow
+    handler (LLM queue wait + hedged generation + GitHub) is never re-claimed."""
+    done = threading.Event()
+
+    def beat():
+        while not done.wait(HEARTBEAT_SEC):
+            try:
+                if not queue.extend(task_id, worker_id):
+                    print(f"[WARN] Task {task_id} is no longer ours; its result will be discarded.")
+                    return
+            except Exception as e:
+                print(f"[WARN] Could not extend task {task_id}: {e}")
+
+    thread = threading.Thread(target=beat, name=f"task-heartbeat-{task_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+
+
+def run_worker() -> None:
+    # assessments are user-facing: each worker is one interactive process in the quota split
+    llm_gateway.configure(llm_gateway.INTERACTIVE)
+    queue = get_queue()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    print(f"[INFO] Task worker {worker_id} started.")
+
+    while True:
+        task = queue.claim(worker_id)
+        if not task:
+            time.sleep(POLL_INTERVAL_SEC)
+            continue
+
+        if task["attempts"] > task["max_attempts"]:
+            # re-claimed after visibility timeouts too many times (worker kept dying)
+            queue.fail(task["id"], worker_id, task.get("error") or "Gave up after repeated worker timeouts")
+            continue
+
+        handler = HANDLERS.get(task["kind"])
+        if handler is None:
+            queue.fail(task["id"], worker_id, f"Unknown task kind: {task['kind']}")
+            continue
+
+        started = time.perf_counter()
+        try:
+            with _keep_claimed(queue, task["id"], worker_id), collect() as spans:
+                result = handler(**task["payload"])
+            queue.complete(task["id"], worker_id, result)
+            log_if_slow("task", task["kind"], (time.perf_counter() - started) * 1000, spans, task_id=task["id"])
+            print(f"[INFO] Task {task['id']} ({task['kind']}) succeeded.")
+        except Exception as e:
+            # 4xx-style errors (missing application, bad job id) won't fix themselves
+            retryable = not (isinstance(e, HTTPException) and e.status_code < 500)
+            if retryable and task["attempts"] < task["max_attempts"]:
+                retry_at = time.time() + backoff_delay(task["attempts"])
+                queue.fail(task["id"], worker_id, str(e), retry_at=retry_at)
+                print(f"[WARN] Task {task['id']} attempt {task['attempts']} failed, retrying: {e}")
+            else:
+                queue.fail(task["id"], worker_id, str(e))
+                print(f"[ERROR] Task {task['id']} failed: {e}")
+
+
+def start_workers(count: int = TASK_WORKERS) -> list:
+    processes = []
+    for _ in range(count):
+        p = Process(target=run_worker, daemon=True)
+        p.start()
+        processes.append(p)
+    return processes
+
+
+if __name__ == "__main__":
+    freeze_support()
+    for p in start_workers():
+        p.join()
@@ -0,0 +1,57 @@
+# test_merkle.py
+"""
+merkle.py must hash exactly like Hydra-head/orchestrator/merkle.js.
+Expected digests were produced in Node: sha256(JSON.stringify(obj)).
+"""
+import math
+
+import pytest
+
+from merkle import build_merkle_root, hash_obj, js_stringify, verify_proof, MerkleAccumulator
+
+JS_DIGESTS = [
+    (5.0, "5", "ef2d127de37b942baad06145e54b0c619a1f22327b2ebbcfbec78f5564afe39d"),
+    (1e-07, "1e-7", "5b33e02f2c5103a05d32f6ba9cb058294452bfbf393967f68bb30c1bdcbbab22"),
+    (
+        {"b": 1, "10": 2, "2": 3, "a": [1.0, -3.25, "é\u2028\u001f"]},
+        '{"2":3,"10":2,"b":1,"a":[1,-3.25,"é\u2028\\u001f"]}',
+        "f7ec6d276f3e10ef3c2e857340fb623be4f1d308347ca277f4bf967731038901",
+    ),
+    (
+        {"block_no": 3, "data": {"amount": 12.0, "rate": 0.07, "tiny": 3e-9, "name": "Zoë"}},
+        '{"block_no":3,"data":{"amount":12,"rate":0.07,"tiny":3e-9,"name":"Zoë"}}',
+        "53d2de36980bbceecc5ea750d6553813357b4f196c0f0a3d103e006cabe788b9",
+    ),
+]
+
+
+@pytest.mark.parametrize("obj, js_text, js_digest", JS_DIGESTS)
+def test_hash_matches_js(obj, js_text, js_digest):
+    assert js_stringify(obj) == js_text
+    assert hash_obj(obj) == js_digest
+
+
+@pytest.mark.parametrize("value, expected", [
+    (1.5e21, "1.5e+21"),
+    (1e21, "1e+21"),
+    (123456789012345680000.0, "123456789012345680000"),
+    (2.5e-6, "0.0000025"),
+    (0.000001, "0.000001"),
+    (-0.0, "0"),
+])
+def test_number_formatting(value, expected):
+    assert js_stringify(value) == expected
+
+
+@pytest.mark.parametrize("value", [math.nan, math.inf, -math.inf])
+def test_non_finite_numbers_are_rejected(value):
+    with pytest.raises(ValueError):
+        hash_obj({"data": value})
+
+
+def test_accumulator_proofs_match_one_shot_root():
+    leaves = [hash_obj({"block_no": i, "data": i / 2}) for i in range(7)]
+    tree = MerkleAccumulator(leaves)
+    assert tree.root == build_merkle_root(leaves)
+    for i in range(len(leaves)):
+        assert verify_proof(tree.leaf(i), tree.proof(i), tree.root)
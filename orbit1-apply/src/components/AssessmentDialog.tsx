@@ -15,6 +15,27 @@ import { Textarea } from "@/components/ui/textarea";
 const API_BASE_URL =
   import.meta.env.VITE_API_BASE_URL || "http://localhost:8000";
 
+// start/submit are processed by background workers: the API answers 202 with a
+// task id, and we poll /tasks/{task_id} until the result is ready.
+const TASK_POLL_MS = 1500;
+const TASK_TIMEOUT_MS = 3 * 60 * 1000;
+
+async function resolveTask(res: Response): Promise<any> {
+  const data = await res.json();
+  if (res.status !== 202 || !data.task_id) return data;
+
+  const deadline = Date.now() + TASK_TIMEOUT_MS;
+  while (Date.now() < deadline) {
+    await new Promise((r) => setTimeout(r, TASK_POLL_MS));
+    const poll = await fetch(`${API_BASE_URL}/tasks/${data.task_id}`);
+    if (!poll.ok) throw new Error(`Task status failed: ${poll.status}`);
+    const task = await poll.json();
+    if (task.status === "succeeded") return task.result;
+    if (task.status === "failed") throw new Error(task.error || "Task failed");
+  }
+  throw new Error("Timed out waiting for task");
+}
+
 interface AssessmentDialogProps {
   applicationId: string;
   jobTitle?: string;
@@ -66,7 +87,7 @@ export const AssessmentDialog = ({
           return;
         }
 
-       const data = await res.json();
+       const data = await resolveTask(res);
 console.log("Assessment start response:", data); // optional but very helpful
 
 let raw: any = [];
@@ -131,7 +152,7 @@ setQuestions(q);
         return;
       }
 
-      const data = await res.json();
+      const data = await resolveTask(res);
       setResult(data.result || data);
       alert("Test submitted! Your result has been recorded.");
     } catch (err) {
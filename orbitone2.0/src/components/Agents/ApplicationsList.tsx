@@ -21,7 +21,7 @@ export interface Application {
   phone: string;
   years_exp: number;
   status?: string;
-  resume_text?: string;
+  resume_preview?: string; // first few hundred chars; full text stays on the server
 
   assessment_result?: {
     score?: number;
@@ -186,9 +186,9 @@ const ApplicationsList: React.FC<ApplicationsListProps> = ({ job, onBack }) => {
                   </p>
                 )}
 
-                {app.resume_text && (
+                {app.resume_preview && (
                   <p className="text-xs text-gray-400 mt-1 line-clamp-2">
-                    {app.resume_text.slice(0, 150)}...
+                    {app.resume_preview.slice(0, 150)}...
                   </p>
                 )}
               </div>